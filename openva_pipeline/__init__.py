@@ -1,27 +1,112 @@
+import sys
+import types
+
 name = "openva_pipeline"
-from .runPipeline import runPipeline
-from .runPipeline import createTransferDB
-from .runPipeline import downloadBriefcase
-from .runPipeline import downloadSmartVA
-from .pipeline import Pipeline
-from .transferDB import TransferDB
-from .odk import ODK
-from .openVA import OpenVA
-from .dhis import API
-from .dhis import VerbalAutopsyEvent
-from .dhis import create_db
-from .dhis import getCODCode
-from .dhis import findKeyValue
-from .dhis import DHIS
-from .exceptions import PipelineError
-from .exceptions import DatabaseConnectionError
-from .exceptions import PipelineConfigurationError
-from .exceptions import ODKConfigurationError
-from .exceptions import OpenVAConfigurationError
-from .exceptions import DHISConfigurationError
-from .exceptions import ODKError
-from .exceptions import OpenVAError
-from .exceptions import SmartVAError
-from .exceptions import DHISError
+
 from .__version__ import __title__, __description__, __url__, __version__
 from .__version__ import __author__, __author_email__, __license__
+
+# Public names are resolved on first access (see _Package) so that importing
+# the package does not pull in pandas, requests, or pysqlcipher3 up front.
+_SUBMODULES = {
+    "runPipeline": (
+        "runPipeline",
+        "createTransferDB",
+        "downloadBriefcase",
+        "downloadSmartVA",
+    ),
+    "pipeline": ("Pipeline",),
+    "transferDB": ("TransferDB",),
+    "odk": ("ODK",),
+    "openVA": ("OpenVA",),
+    "dhis": (
+        "API",
+        "VerbalAutopsyEvent",
+        "create_db",
+        "getCODCode",
+        "findKeyValue",
+        "DHIS",
+    ),
+    "exceptions": (
+        "PipelineError",
+        "DatabaseConnectionError",
+        "PipelineConfigurationError",
+        "ODKConfigurationError",
+        "OpenVAConfigurationError",
+        "DHISConfigurationError",
+        "ODKError",
+        "OpenVAError",
+        "SmartVAError",
+        "DHISError",
+    ),
+}
+_LAZY = {attr: mod for mod, attrs in _SUBMODULES.items() for attr in attrs}
+
+__all__ = (
+    "runPipeline",
+    "createTransferDB",
+    "downloadBriefcase",
+    "downloadSmartVA",
+    "Pipeline",
+    "TransferDB",
+    "ODK",
+    "OpenVA",
+    "API",
+    "VerbalAutopsyEvent",
+    "create_db",
+    "getCODCode",
+    "findKeyValue",
+    "DHIS",
+    "PipelineError",
+    "DatabaseConnectionError",
+    "PipelineConfigurationError",
+    "ODKConfigurationError",
+    "OpenVAConfigurationError",
+    "DHISConfigurationError",
+    "ODKError",
+    "OpenVAError",
+    "SmartVAError",
+    "DHISError",
+)
+
+
+class _Package(types.ModuleType):
+    """Package module that imports its public names on first access.
+
+    The lookup lives on the module class (rather than in a PEP 562 module
+    __getattr__) so that it also works on Python 3.6.  Importing a submodule
+    (e.g. ``import openva_pipeline.runPipeline``) sets it as an attribute of
+    the package, which would hide a public name of the same name (the
+    runPipeline function).  Such a submodule binds its public names instead.
+    """
+
+    def __getattr__(self, name):
+        mod = _LAZY.get(name)
+        if mod is None:
+            raise AttributeError(
+                "module {!r} has no attribute {!r}".format(__name__, name)
+            )
+        import importlib
+
+        # bind every name the submodule provides so it is only imported once
+        m = importlib.import_module("." + mod, __name__)
+        for attr in _SUBMODULES[mod]:
+            super().__setattr__(attr, getattr(m, attr))
+        return self.__dict__[name]
+
+    def __dir__(self):
+        return sorted(set(self.__dict__).union(_LAZY))
+
+    def __setattr__(self, name, value):
+        if (
+            isinstance(value, types.ModuleType)
+            and _LAZY.get(name) == name
+            and value.__name__ == __name__ + "." + name
+        ):
+            for attr in _SUBMODULES[name]:
+                super().__setattr__(attr, getattr(value, attr))
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
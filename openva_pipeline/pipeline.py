@@ -45,6 +45,27 @@ class Pipeline:
         nowDate = datetime.datetime.now()
         self.pipelineRunDate = nowDate.strftime("%Y-%m-%d_%H:%M:%S")
         self.useDHIS = useDHIS
+        # every step shares one TransferDB, so the (keyed) connection is
+        # opened once per run instead of once per step
+        self._xferDB = None
+
+    def _transferDB(self):
+        """Return the TransferDB shared by the pipeline steps."""
+
+        if self._xferDB is None:
+            self._xferDB = TransferDB(
+                dbFileName=self.dbFileName,
+                dbDirectory=self.dbDirectory,
+                dbKey=self.dbKey,
+                plRunDate=self.pipelineRunDate,
+            )
+        return self._xferDB
+
+    def closeDB(self):
+        """Close the Transfer DB connection shared by the pipeline steps."""
+
+        if self._xferDB is not None:
+            self._xferDB.close()
 
     def logEvent(self, eventDesc, eventType):
         """Commit event or error message into EventLog table of transfer database.
@@ -68,12 +89,7 @@ class Pipeline:
                 print(str(e) + "...Can't create dbErrorLog.csv")
                 sys.exit(1)
         try:
-            xferDB = TransferDB(
-                dbFileName=self.dbFileName,
-                dbDirectory=self.dbDirectory,
-                dbKey=self.dbKey,
-                plRunDate=self.pipelineRunDate,
-            )
+            xferDB = self._transferDB()
             conn = xferDB.connectDB()
             c = conn.cursor()
             sql = "INSERT INTO EventLog \
@@ -81,7 +97,6 @@ class Pipeline:
             par = (eventDesc, eventType, timeFMT)
             c.execute(sql, par)
             conn.commit()
-            conn.close()
         except (DatabaseConnectionError) as e:
             errorMsg = [timeFMT, str(e), "Committed by Pipeline.logEvent"]
             try:
@@ -116,28 +131,10 @@ class Pipeline:
         :rtype: dictionary
         """
 
-        xferDB = TransferDB(
-            dbFileName=self.dbFileName,
-            dbDirectory=self.dbDirectory,
-            dbKey=self.dbKey,
-            plRunDate=self.pipelineRunDate,
-        )
+        xferDB = self._transferDB()
         conn = xferDB.connectDB()
-        settingsPipeline = xferDB.configPipeline(conn)
-        settingsODK = xferDB.configODK(conn)
-        settingsOpenVA = xferDB.configOpenVA(
-            conn, settingsPipeline.algorithm, settingsPipeline.workingDirectory
-        )
-        settings = {
-            "pipeline": settingsPipeline,
-            "odk": settingsODK,
-            "openVA": settingsOpenVA,
-        }
-        if self.useDHIS:
-            settingsDHIS = xferDB.configDHIS(conn, settingsPipeline.algorithm)
-            settings["dhis"] = settingsDHIS
-            conn.close()
-            return settings
+        settings = xferDB.loadAllConfig(conn, self.useDHIS)
+        return settings
 
     def runODK(self, argsODK, argsPipeline):
         """Run check duplicates, copy file, and briefcase.
@@ -169,16 +166,10 @@ class Pipeline:
             odkCentral = pipelineODK.central()
         else:
             odkBC = pipelineODK.briefcase()
-        xferDB = TransferDB(
-            dbFileName=self.dbFileName,
-            dbDirectory=self.dbDirectory,
-            dbKey=self.dbKey,
-            plRunDate=self.pipelineRunDate,
-        )
+        xferDB = self._transferDB()
         conn = xferDB.connectDB()
         xferDB.configPipeline(conn)
         xferDB.checkDuplicates(conn)
-        conn.close()
         if argsODK.odkUseCentral == "True":
             return odkCentral
         else:
@@ -260,16 +251,10 @@ class Pipeline:
     def storeResultsDB(self):
         """Store VA results in Transfer database."""
 
-        xferDB = TransferDB(
-            dbFileName=self.dbFileName,
-            dbDirectory=self.dbDirectory,
-            dbKey=self.dbKey,
-            plRunDate=self.pipelineRunDate,
-        )
+        xferDB = self._transferDB()
         conn = xferDB.connectDB()
         xferDB.configPipeline(conn)
         xferDB.storeVA(conn)
-        conn.close()
 
     def closePipeline(self):
         """Update ODK_Conf ODKLastRun in Transfer DB and clean up files.
@@ -296,16 +281,10 @@ class Pipeline:
         pipeline.
         """
 
-        xferDB = TransferDB(
-            dbFileName=self.dbFileName,
-            dbDirectory=self.dbDirectory,
-            dbKey=self.dbKey,
-            plRunDate=self.pipelineRunDate,
-        )
+        xferDB = self._transferDB()
         conn = xferDB.connectDB()
         xferDB.configPipeline(conn)
         xferDB.cleanODK()
         xferDB.cleanOpenVA()
         xferDB.cleanDHIS()
         xferDB.updateODKLastRun(conn, self.pipelineRunDate)
-        conn.close()
@@ -21,6 +21,7 @@ import requests
 from pysqlcipher3 import dbapi2 as sqlcipher
 
 from openva_pipeline.pipeline import Pipeline
+from openva_pipeline.transferDB import pragmaKeyStatement
 from openva_pipeline.exceptions import PipelineError
 from openva_pipeline.exceptions import DatabaseConnectionError
 from openva_pipeline.exceptions import PipelineConfigurationError
@@ -49,8 +50,7 @@ def createTransferDB(database_file_name, database_directory, database_key):
     except (sqlcipher.DatabaseError, sqlcipher.OperationalError) as e:
         raise DatabaseConnectionError("Unable to create database..." + str(e))
     try:
-        parSetKey = '"' + database_key + '"'
-        conn.execute("PRAGMA key = " + parSetKey)
+        conn.execute(pragmaKeyStatement(database_key))
         # c = conn.cursor()
     except (sqlcipher.DatabaseError, sqlcipher.OperationalError) as e:
         raise DatabaseConnectionError("Unable to set encryption key..." + str(e))
@@ -62,6 +62,13 @@ def createTransferDB(database_file_name, database_directory, database_key):
         raise DatabaseConnectionError(
             "Problem running script (pipelineDB.sql)..." + str(e)
         )
+    # WAL mode is stored in the database file, so it is set once here (for
+    # new databases) rather than on every connection
+    try:
+        conn.execute("PRAGMA journal_mode = WAL;")
+    except (sqlcipher.DatabaseError, sqlcipher.OperationalError) as e:
+        raise DatabaseConnectionError("Unable to set journal mode..." + str(e))
+    conn.close()
 
 
 def runPipeline(
@@ -142,6 +149,7 @@ def runPipeline(
     except (DatabaseConnectionError, DatabaseConnectionError) as e:
         pl.logEvent(str(e), "Error")
         sys.exit(1)
+    pl.closeDB()
 
 
 def downloadBriefcase():
@@ -6,13 +6,14 @@ This module handles interactions with the Transfer database.
 """
 
 import os
+import re
 import shutil
 import collections
 import datetime
 import sqlite3
 from pickle import dumps
+from urllib.parse import quote
 from pandas import read_csv
-from pysqlcipher3 import dbapi2 as sqlcipher
 
 from .exceptions import DatabaseConnectionError
 from .exceptions import PipelineConfigurationError
@@ -22,6 +23,400 @@ from .exceptions import PipelineError
 from .exceptions import OpenVAConfigurationError
 from .exceptions import DHISConfigurationError
 
+# SQL statements are kept as module constants so every call passes the
+# identical string (and hits SQLite's statement cache).  Each configuration
+# table holds a single row, so its SELECT ends with LIMIT 1.
+_SQL_TEST_CONNECTION = "SELECT name FROM SQLITE_MASTER where type = 'table';"
+_SQL_PIPELINE = (
+    "SELECT algorithmMetadataCode, codSource, algorithm, "
+    "workingDirectory FROM Pipeline_Conf LIMIT 1;"
+)
+_SQL_ODK = (
+    "SELECT odkID, odkURL, odkUser, odkPassword, odkFormID, odkLastRun, "
+    "odkUseCentral, odkProjectNumber FROM ODK_Conf LIMIT 1;"
+)
+_SQL_UPDATE_ODK_LAST_RUN = "UPDATE ODK_Conf SET odkLastRun = ?"
+# each algorithm's (single-row) Conf and Advanced_Conf tables are read
+# together in one query
+_SQL_INTERVA = (
+    "SELECT version, HIV, Malaria, "
+    "output, append, groupcode, "
+    "replicate, replicate_bug1, replicate_bug2 "
+    "FROM InterVA_Conf, Advanced_InterVA_Conf LIMIT 1;"
+)
+_SQL_INSILICOVA = (
+    "SELECT data_type, Nsim, "
+    "isNumeric, updateCondProb, "
+    "keepProbbase_level, CondProb, "
+    "CondProbNum, datacheck, "
+    "datacheck_missing, external_sep, thin, "
+    "burnin, auto_length, conv_csmf, "
+    "jump_scale, levels_prior, "
+    "levels_strength, trunc_min, trunc_max, "
+    "subpop, java_option, seed, phy_code, "
+    "phy_cat, phy_unknown, phy_external, "
+    "phy_debias, exclude_impossible_cause, "
+    "no_is_missing, indiv_CI, groupcode "
+    "FROM InSilicoVA_Conf, Advanced_InSilicoVA_Conf LIMIT 1;"
+)
+_SQL_SMARTVA = (
+    "SELECT country, hiv, malaria, hce, freetext, "
+    "figures, language FROM SmartVA_Conf LIMIT 1;"
+)
+_SQL_SMARTVA_COUNTRY = "SELECT 1 FROM SmartVA_Country WHERE abbrev = ? LIMIT 1;"
+_SQL_DHIS = (
+    "SELECT dhisURL, dhisUser, dhisPassword, dhisOrgUnit FROM DHIS_Conf LIMIT 1;"
+)
+_SQL_COD_CODES = "SELECT codName, codCode FROM COD_Codes_DHIS WHERE codSource = ?"
+_SQL_VA_IDS = "SELECT id FROM VA_Storage"
+_SQL_INSERT_EVENT = (
+    "INSERT INTO EventLog (eventDesc, eventType, eventTime) VALUES (?, ?, ?)"
+)
+_SQL_INSERT_VA = (
+    "INSERT INTO VA_Storage (id, outcome, record, dateEntered) "
+    "VALUES (?, ?, ?, ?)"
+)
+
+# settings returned by the config methods
+ntPipeline = collections.namedtuple(
+    "ntPipeline",
+    ["algorithmMetadataCode", "codSource", "algorithm", "workingDirectory"],
+)
+ntODK = collections.namedtuple(
+    "ntODK",
+    [
+        "odkID",
+        "odkURL",
+        "odkUser",
+        "odkPassword",
+        "odkFormID",
+        "odkLastRun",
+        # "odkLastRunResult",
+        "odkLastRunDate",
+        "odkLastRunDatePrev",
+        "odkUseCentral",
+        "odkProjectNumber",
+    ],
+)
+ntInterVA = collections.namedtuple(
+    "ntInterVA",
+    [
+        "InterVA_Version",
+        "InterVA_HIV",
+        "InterVA_Malaria",
+        "InterVA_output",
+        "InterVA_append",
+        "InterVA_groupcode",
+        "InterVA_replicate",
+        "InterVA_replicate_bug1",
+        "InterVA_replicate_bug2",
+    ],
+)
+ntInSilicoVA = collections.namedtuple(
+    "ntInSilicoVA",
+    [
+        "InSilicoVA_data_type",
+        "InSilicoVA_Nsim",
+        "InSilicoVA_isNumeric",
+        "InSilicoVA_updateCondProb",
+        "InSilicoVA_keepProbbase_level",
+        "InSilicoVA_CondProb",
+        "InSilicoVA_CondProbNum",
+        "InSilicoVA_datacheck",
+        "InSilicoVA_datacheck_missing",
+        "InSilicoVA_external_sep",
+        "InSilicoVA_thin",
+        "InSilicoVA_burnin",
+        "InSilicoVA_auto_length",
+        "InSilicoVA_conv_csmf",
+        "InSilicoVA_jump_scale",
+        "InSilicoVA_levels_prior",
+        "InSilicoVA_levels_strength",
+        "InSilicoVA_trunc_min",
+        "InSilicoVA_trunc_max",
+        "InSilicoVA_subpop",
+        "InSilicoVA_java_option",
+        "InSilicoVA_seed",
+        "InSilicoVA_phy_code",
+        "InSilicoVA_phy_cat",
+        "InSilicoVA_phy_unknown",
+        "InSilicoVA_phy_external",
+        "InSilicoVA_phy_debias",
+        "InSilicoVA_exclude_impossible_cause",
+        "InSilicoVA_no_is_missing",
+        "InSilicoVA_indiv_CI",
+        "InSilicoVA_groupcode",
+    ],
+)
+ntSmartVA = collections.namedtuple(
+    "ntSmartVA",
+    [
+        "SmartVA_country",
+        "SmartVA_hiv",
+        "SmartVA_malaria",
+        "SmartVA_hce",
+        "SmartVA_freetext",
+        "SmartVA_figures",
+        "SmartVA_language",
+    ],
+)
+ntDHIS = collections.namedtuple(
+    "ntDHIS", ["dhisURL", "dhisUser", "dhisPassword", "dhisOrgUnit"]
+)
+
+# InSilicoVA java_option (size in megabytes or gigabytes)
+_JAVA_OPT_RE = re.compile(r"-Xmx(\d+(?:\.\d+)?)([mg])")
+# InSilicoVA indiv_CI (a decimal strictly between 0 and 1, e.g. 0.95)
+_CI_RE = re.compile(r"0?\.\d+")
+
+_BOOL_SET = frozenset(("TRUE", "FALSE"))
+_HLV_SET = frozenset(("v", "l", "h"))
+_COD_SET = frozenset(("ICD10", "WHO", "Tariff"))
+_ALGO_SET = frozenset(("InterVA", "InSilicoVA", "SmartVA"))
+_INTERVA_VERSION_SET = frozenset(("4", "5"))
+_INTERVA_OUTPUT_SET = frozenset(("classic", "extended"))
+_INSILICOVA_DATA_TYPE_SET = frozenset(("WHO2012", "WHO2016"))
+_EXCLUDE_CAUSE_SET = frozenset(("subset", "all", "InterVA", "none"))
+_SMARTVA_BOOL_SET = frozenset(("True", "False"))
+_LANG_SET = frozenset(("english", "chinese", "spanish"))
+_EMPTY_SET = frozenset(("", None))
+
+
+def _configError(error, field, hint=None):
+    """Build the exception for an invalid setting in the Transfer database.
+
+    :param error: Exception class to use (e.g. OpenVAConfigurationError).
+    :param field: Table and column holding the setting ("Table.column").
+    :param hint: Optional description of the valid values.
+    :returns: error("Problem in database: <field> (<hint>).")
+    """
+
+    if hint is None:
+        return error("Problem in database: " + field)
+    return error("Problem in database: " + field + " (" + hint + ").")
+
+
+def _notEmpty(value):
+    return value not in _EMPTY_SET
+
+
+def _floatCheck(lower=None, upper=None, strict=False, allowNULL=False):
+    """Return a check that value is a number within the (optional) bounds.
+
+    The bounds are inclusive unless strict is True; with allowNULL the string
+    "NULL" is also accepted.
+    """
+
+    def check(value):
+        if allowNULL and value == "NULL":
+            return True
+        try:
+            floatValue = float(value)
+        except (TypeError, ValueError):
+            return False
+        if lower is not None and not (
+            lower < floatValue if strict else lower <= floatValue
+        ):
+            return False
+        if upper is not None and not (
+            floatValue < upper if strict else floatValue <= upper
+        ):
+            return False
+        return True
+
+    return check
+
+
+def _validJavaOption(value):
+    joMatch = _JAVA_OPT_RE.fullmatch(value or "")
+    return joMatch is not None and float(joMatch.group(1)) > 0
+
+
+def _validIndivCI(value):
+    if value == "NULL":
+        return True
+    return _CI_RE.fullmatch(str(value)) is not None and float(value) > 0
+
+
+def _validURL(value):
+    return isinstance(value, str) and value.startswith(("http://", "https://"))
+
+
+def _validateRow(row, spec, error):
+    """Check a configuration row against a validation spec.
+
+    :param row: Row returned by one of the config queries.
+    :param spec: Entries of (index in row, "Table.column", valid, hint), where
+      valid is either a frozenset of valid options or a function returning
+      True for a valid value.
+    :param error: Exception class raised (see _configError) for the first
+      invalid value.
+    """
+
+    for index, field, valid, hint in spec:
+        value = row[index]
+        if isinstance(valid, frozenset):
+            isValid = value in valid
+        else:
+            isValid = valid(value)
+        if not isValid:
+            raise _configError(error, field, hint)
+
+
+# Validation specs for the config queries: (index in the query row,
+# "Table.column", valid options or check, hint).  Cheap checks come first.
+_TF = "valid options: 'TRUE' or 'FALSE'"
+_R_OBJECT = "valid options: name of R object"
+_BETWEEN_0_1 = "must be between '0' and '1'"
+_HLV = "valid options: 'v', 'l', or 'h'"
+_POSITIVE = "must be greater than '0'"
+_EMPTY = "is empty"
+_PIPELINE_SPEC = (
+    (1, "Pipeline_Conf.codSource", _COD_SET, None),
+    (2, "Pipeline_Conf.algorithm", _ALGO_SET, None),
+)
+_INTERVA_SPEC = (
+    (0, "InterVA_Conf.version", _INTERVA_VERSION_SET, "valid options: '4' or '5'"),
+    (1, "InterVA_Conf.HIV", _HLV_SET, _HLV),
+    (2, "InterVA_Conf.Malaria", _HLV_SET, _HLV),
+    (3, "Advanced_InterVA_Conf.output", _INTERVA_OUTPUT_SET, None),
+    (4, "Advanced_InterVA_Conf.append", _BOOL_SET, None),
+    (5, "Advanced_InterVA_Conf.groupcode", _BOOL_SET, None),
+    (6, "Advanced_InterVA_Conf.replicate", _BOOL_SET, None),
+    (7, "Advanced_InterVA_Conf.replicate_bug1", _BOOL_SET, None),
+    (8, "Advanced_InterVA_Conf.replicate_bug2", _BOOL_SET, None),
+)
+_INSILICOVA_SPEC = (
+    (
+        0,
+        "InSilicoVA_Conf.data_type",
+        _INSILICOVA_DATA_TYPE_SET,
+        "valid options: 'WHO2012' or 'WHO2016'",
+    ),
+    (2, "InSilicoVA_Conf.isNumeric", _BOOL_SET, _TF),
+    (3, "InSilicoVA_Conf.updateCondProb", _BOOL_SET, _TF),
+    (4, "InSilicoVA_Conf.keepProbbase_level", _BOOL_SET, _TF),
+    (7, "InSilicoVA_Conf.datacheck", _BOOL_SET, _TF),
+    (8, "InSilicoVA_Conf.datacheck_missing", _BOOL_SET, _TF),
+    (9, "InSilicoVA_Conf.external_sep", _BOOL_SET, _TF),
+    (12, "InSilicoVA_Conf.auto_length", _BOOL_SET, _TF),
+    (
+        27,
+        "InSilicoVA_Conf.exclude_impossible_cause",
+        _EXCLUDE_CAUSE_SET,
+        "valid options: 'subset', 'all', 'InterVA', and 'none'",
+    ),
+    (28, "InSilicoVA_Conf.no_is_missing", _BOOL_SET, _TF),
+    (30, "InSilicoVA_Conf.groupcode", _BOOL_SET, _TF),
+    (1, "InSilicoVA_Conf.Nsim", _notEmpty, None),
+    (5, "InSilicoVA_Conf.CondProb", _notEmpty, _R_OBJECT),
+    (15, "InSilicoVA_Conf.levels_prior", _notEmpty, _R_OBJECT),
+    (19, "InSilicoVA_Conf.subpop", _notEmpty, _R_OBJECT),
+    (22, "InSilicoVA_Conf.phy_code", _notEmpty, _R_OBJECT),
+    (23, "InSilicoVA_Conf.phy_cat", _notEmpty, _R_OBJECT),
+    (24, "InSilicoVA_Conf.phy_unknown", _notEmpty, _R_OBJECT),
+    (25, "InSilicoVA_Conf.phy_external", _notEmpty, _R_OBJECT),
+    (26, "InSilicoVA_Conf.phy_debias", _notEmpty, _R_OBJECT),
+    (
+        20,
+        "InSilicoVA_Conf.java_option",
+        _validJavaOption,
+        "should look like '-Xmx1g'",
+    ),
+    (13, "InSilicoVA_Conf.conv_csmf", _floatCheck(0, 1), _BETWEEN_0_1),
+    (17, "InSilicoVA_Conf.trunc_min", _floatCheck(0, 1), _BETWEEN_0_1),
+    (18, "InSilicoVA_Conf.trunc_max", _floatCheck(0, 1), _BETWEEN_0_1),
+    (10, "InSilicoVA_Conf.thin", _floatCheck(0, strict=True), "must be 'thin' > 0"),
+    (
+        11,
+        "InSilicoVA_Conf.burnin",
+        _floatCheck(0, strict=True),
+        "must be 'burnin' > 0",
+    ),
+    (
+        14,
+        "InSilicoVA_Conf.jump_scale",
+        _floatCheck(0, strict=True),
+        _POSITIVE,
+    ),
+    (
+        16,
+        "InSilicoVA_Conf.levels_strength",
+        _floatCheck(0, strict=True),
+        _POSITIVE,
+    ),
+    (
+        21,
+        "InSilicoVA_Conf.seed",
+        _floatCheck(),
+        "must be a number; preferably an integer",
+    ),
+    (
+        6,
+        "InSilicoVA_Conf.CondProbNum",
+        _floatCheck(0, 1, allowNULL=True),
+        _BETWEEN_0_1,
+    ),
+    (29, "InSilicoVA_Conf.indiv_CI", _validIndivCI, _BETWEEN_0_1),
+)
+# (the SmartVA_Conf.country check needs the SmartVA_Country table)
+_SMARTVA_SPEC = (
+    (1, "SmartVA_Conf.hiv", _SMARTVA_BOOL_SET, None),
+    (2, "SmartVA_Conf.malaria", _SMARTVA_BOOL_SET, None),
+    (3, "SmartVA_Conf.hce", _SMARTVA_BOOL_SET, None),
+    (4, "SmartVA_Conf.freetext", _SMARTVA_BOOL_SET, None),
+    (5, "SmartVA_Conf.figures", _SMARTVA_BOOL_SET, None),
+    (6, "SmartVA_Conf.language", _LANG_SET, None),
+)
+_DHIS_SPEC = (
+    (0, "DHIS_Conf.dhisURL", _validURL, None),
+    (1, "DHIS_Conf.dhisUser", _notEmpty, _EMPTY),
+    (2, "DHIS_Conf.dhisPassword", _notEmpty, _EMPTY),
+    (3, "DHIS_Conf.dhisOrgUnit", _notEmpty, _EMPTY),
+)
+
+
+def pragmaKeyStatement(dbKey):
+    """Build the PRAGMA key statement for the Transfer database.
+
+    PRAGMA key cannot take a bound parameter, so the key is written as an SQL
+    string literal (doubling embedded quotes).  A passphrase goes through
+    SQLCipher's key derivation; a raw key must be given explicitly in the
+    form x'<64 hexadecimal characters>' (which skips the derivation).  Used
+    both to create (:func:`createTransferDB
+    <openva_pipeline.runPipeline.createTransferDB>`) and to open
+    (:meth:`TransferDB.connectDB`) the database, so they always agree.
+
+    :param dbKey: Encryption key for the Transfer database.
+    :type dbKey: str
+    :returns: PRAGMA key statement
+    :rtype: str
+    :raises: DatabaseConnectionError (if dbKey contains a null character,
+      where SQLite would silently truncate the key)
+    """
+
+    if "\0" in dbKey:
+        raise DatabaseConnectionError(
+            "Transfer DB key must not contain null characters."
+        )
+    return "PRAGMA key = '" + dbKey.replace("'", "''") + "';"
+
+
+def _fetchConfigRow(c, sql, table, error=PipelineConfigurationError):
+    """Return the (single) row of a configuration table.
+
+    :raises: error if the query fails or the table is empty
+    """
+
+    sqlcipher = TransferDB._dbapi()
+    try:
+        row = c.execute(sql).fetchone()
+    except (sqlcipher.OperationalError) as e:
+        raise error("Problem in database table " + table + "..." + str(e))
+    if row is None:
+        raise error("Problem in database table " + table + "...(no rows)")
+    return row
+
 
 class TransferDB:
     """This class handles interactions with the Transfer database.
@@ -37,50 +432,165 @@ class TransferDB:
     :type dbFileName: str
     :param dbDirectory: Path of folder containing the Transfer database.
     :type dbDirectory: str
-    :param dbKey: Encryption key for the Transfer database.
+    :param dbKey: Encryption key for the Transfer database (a passphrase, or a
+      raw 256-bit key in SQLCipher's x'<64 hexadecimal characters>' form).
     :type dbKey: str
     :param plRunDate: Date when pipeline started latest
       run (YYYY-MM-DD_hh:mm:ss).
     :type plRunDate: date
+    :raises: DatabaseConnectionError (if dbKey contains a null character)
     """
 
+    # Validated settings shared by all instances, keyed by (dbPath, kind,
+    # extra arguments) and holding (database file stamp, settings).
+    _configCache = {}
+    # pysqlcipher3's dbapi2 module, imported on first use (see _dbapi)
+    _sqlcipher = None
+
     def __init__(self, dbFileName, dbDirectory, dbKey, plRunDate):
 
         self.dbFileName = dbFileName
         self.dbDirectory = dbDirectory
         self.dbKey = dbKey
+        self._pragmaKeyStmt = pragmaKeyStatement(dbKey)
         self.dbPath = os.path.join(dbDirectory, dbFileName)
+        # read-write URI: connecting fails (instead of creating an empty
+        # database) when the file does not exist
+        self._dbURI = "file:" + quote(self.dbPath) + "?mode=rw"
         self.workingDirectory = None
         self.plRunDate = plRunDate
+        self._conn = None
+        self._cursor = None
+        # database stamp taken when loadAllConfig opened its own (read-only)
+        # transaction, None otherwise
+        self._readSnapshot = None
+
+    @staticmethod
+    def _dbapi():
+        """Import pysqlcipher3 on first use and cache it on the class."""
+
+        if TransferDB._sqlcipher is None:
+            from pysqlcipher3 import dbapi2
+
+            TransferDB._sqlcipher = dbapi2
+        return TransferDB._sqlcipher
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
 
     def connectDB(self):
         """Connect to Transfer database.
 
         Uses parameters supplied to the parent class, TransferDB, to connect to
-        the (encrypted) Transfer database.
+        the (encrypted) Transfer database.  The connection is opened (and
+        keyed) once and then reused by later calls until it is closed.
 
         :returns: Used to query (encrypted) SQLite database.
         :rtype: SQLite database connection object
         :raises: DatabaseConnectionError
         """
 
-        dbFilePresent = os.path.isfile(self.dbPath)
-        if not dbFilePresent:
-            raise DatabaseConnectionError("")
+        sqlcipher = self._dbapi()
+        if self._conn is not None:
+            try:
+                self._conn.total_changes
+                return self._conn
+            except sqlcipher.ProgrammingError:
+                # the caller closed the connection
+                self._conn = None
+                self._cursor = None
 
-        conn = sqlcipher.connect(self.dbPath)
-        parSetKey = '"' + self.dbKey + '"'
-        conn.execute("PRAGMA key = " + parSetKey)
         try:
-            sqlTestConnection = (
-                "SELECT name FROM SQLITE_MASTER " "where type = 'table';"
+            conn = sqlcipher.connect(self._dbURI, uri=True)
+        except (sqlcipher.OperationalError) as e:
+            raise DatabaseConnectionError(
+                "Unable to open Transfer DB " + self.dbPath + "..." + str(e)
             )
-            conn.execute(sqlTestConnection)
+        conn.execute(self._pragmaKeyStmt)
+        try:
+            conn.execute(_SQL_TEST_CONNECTION)
         except (sqlcipher.DatabaseError) as e:
             raise DatabaseConnectionError("Database password error..." + str(e))
+        conn.executescript(
+            "PRAGMA synchronous = NORMAL; "
+            "PRAGMA temp_store = MEMORY; "
+            "PRAGMA cache_size = -65536;"
+        )
 
+        self._conn = conn
+        self._cursor = conn.cursor()
         return conn
 
+    def close(self):
+        """Close the connection opened by :meth:`connectDB` (if any)."""
+
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._cursor = None
+
+    def _getCursor(self, conn):
+        """Return the cached cursor for the pooled connection (or a new one)."""
+
+        if conn is self._conn and self._cursor is not None:
+            return self._cursor
+        return conn.cursor()
+
+    def _dbStamp(self):
+        """Return the modification time and size of the Transfer database.
+
+        In WAL mode commits are written to the -wal file first, so its
+        modification time and size are included as well (an empty -wal file
+        holds no commits and counts as missing).  Inside the read transaction
+        of :meth:`loadAllConfig` the stamp taken just before it began is
+        returned, so nothing committed later is attributed to the snapshot.
+        """
+
+        if self._readSnapshot is not None:
+            return self._readSnapshot
+        dbStat = os.stat(self.dbPath)
+        walStamp = None
+        try:
+            walStat = os.stat(self.dbPath + "-wal")
+            if walStat.st_size > 0:
+                walStamp = (walStat.st_mtime_ns, walStat.st_size)
+        except FileNotFoundError:
+            pass
+        return (dbStat.st_mtime_ns, dbStat.st_size, walStamp)
+
+    def _cacheable(self, c):
+        """Can settings read through cursor c be cached (see _cachedConfig)?"""
+
+        conn = c.connection
+        if conn is not self._conn:
+            return False
+        return self._readSnapshot is not None or not conn.in_transaction
+
+    def _cachedConfig(self, c, kind, loader, *args):
+        """Return memoized configuration settings.
+
+        The settings are rebuilt with loader(c, *args) whenever the Transfer
+        database file has changed since they were cached.  Only cursors on
+        the connection opened by :meth:`connectDB` use the cache.  A
+        connection with an open transaction may see uncommitted changes, so
+        it always bypasses the cache (except for the read-only transaction
+        opened by :meth:`loadAllConfig`).
+        """
+
+        if not self._cacheable(c):
+            return loader(c, *args)
+        key = (os.path.realpath(self.dbPath), kind) + args
+        stamp = self._dbStamp()
+        cached = TransferDB._configCache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        settings = loader(c, *args)
+        TransferDB._configCache[key] = (stamp, settings)
+        return settings
+
     def configPipeline(self, conn):
         """Grabs Pipline configuration settings.
 
@@ -97,57 +607,31 @@ class TransferDB:
         :raises: PipelineConfigurationError
         """
 
-        c = conn.cursor()
+        return self._pipelineSettings(self._getCursor(conn))
 
-        # try:
-        #     c.execute("SELECT dhisCode from Algorithm_Metadata_Options;")
-        #     metadataQuery = c.fetchall()
-        # except (sqlcipher.OperationalError) as e:
-        #     raise PipelineConfigurationError \
-        #         ("Problem in database table Algorithm_Metadata_Options..." +
-        #          str(e)
-        #         )
+    def _pipelineSettings(self, c):
+        """Return (cached) Pipeline settings and record the working directory."""
 
-        try:
-            sqlPipeline = (
-                "SELECT algorithmMetadataCode, codSource, algorithm, "
-                "workingDirectory FROM Pipeline_Conf;"
-            )
-            queryPipeline = c.execute(sqlPipeline).fetchall()
-        except (sqlcipher.OperationalError) as e:
-            raise PipelineConfigurationError(
-                "Problem in database table Pipeline_Conf..." + str(e)
+        settingsPipeline = self._cachedConfig(
+            c, "Pipeline_Conf", self._configPipeline
+        )
+        # checked on every call (the directory can go away while the cached
+        # settings stay valid)
+        if not os.path.isdir(settingsPipeline.workingDirectory):
+            raise _configError(
+                PipelineConfigurationError, "Pipeline_Conf.workingDirectory"
             )
+        self.workingDirectory = settingsPipeline.workingDirectory
+        return settingsPipeline
 
-        algorithmMetadataCode = queryPipeline[0][0]
-        # if algorithmMetadataCode not in [j for i in metadataQuery for j in i]:
-        #     raise PipelineConfigurationError \
-        #         ("Problem in database: Pipeline_Conf.algorithmMetadataCode")
-        codSource = queryPipeline[0][1]
-        if codSource not in ("ICD10", "WHO", "Tariff"):
-            raise PipelineConfigurationError(
-                "Problem in database: Pipeline_Conf.codSource"
-            )
-        algorithm = queryPipeline[0][2]
-        if algorithm not in ("InterVA", "InSilicoVA", "SmartVA"):
-            raise PipelineConfigurationError(
-                "Problem in database: Pipeline_Conf.algorithm"
-            )
-        workingDirectory = queryPipeline[0][3]
-        if not os.path.isdir(workingDirectory):
-            raise PipelineConfigurationError(
-                "Problem in database: Pipeline_Conf.workingDirectory"
-            )
+    def _configPipeline(self, c):
+        """Query and validate the Pipeline_Conf table (see configPipeline)."""
 
-        ntPipeline = collections.namedtuple(
-            "ntPipeline",
-            ["algorithmMetadataCode", "codSource", "algorithm", "workingDirectory"],
-        )
-        settingsPipeline = ntPipeline(
-            algorithmMetadataCode, codSource, algorithm, workingDirectory
-        )
-        self.workingDirectory = workingDirectory
-        return settingsPipeline
+        queryPipeline = _fetchConfigRow(c, _SQL_PIPELINE, "Pipeline_Conf")
+        _validateRow(queryPipeline, _PIPELINE_SPEC, PipelineConfigurationError)
+        # (workingDirectory is checked by _pipelineSettings)
+
+        return ntPipeline._make(queryPipeline)
 
     def configODK(self, conn):
         """Query ODK configuration settings from database.
@@ -171,73 +655,59 @@ class TransferDB:
         :raises: ODKConfigurationError
         """
 
-        c = conn.cursor()
-        sqlODK = (
-            "SELECT odkID, odkURL, odkUser, odkPassword, odkFormID, "
-            "odkLastRun, odkUseCentral, odkProjectNumber FROM ODK_Conf;"
-        )
-        try:
-            queryODK = c.execute(sqlODK).fetchall()
-        except (sqlcipher.OperationalError) as e:
-            raise ODKConfigurationError(
-                "Problem in database table ODK_Conf..." + str(e)
-            )
-        odkID = queryODK[0][0]
-        odkURL = queryODK[0][1]
-        startHTML = odkURL[0:7]
-        startHTMLS = odkURL[0:8]
-        if not (startHTML == "http://" or startHTMLS == "https://"):
-            raise ODKConfigurationError("Problem in database: ODK_Conf.odkURL")
-        odkUser = queryODK[0][2]
-        odkPassword = queryODK[0][3]
-        odkFormID = queryODK[0][4]
-        odkLastRun = queryODK[0][5]
-        odkUseCentral = queryODK[0][6]
-        odkProjectNumber = queryODK[0][7]
-        # odkLastRunResult = queryODK[0][6]
+        c = self._getCursor(conn)
+        return self._cachedConfig(c, "ODK_Conf", self._configODK)
+
+    def _configODK(self, c):
+        """Query and validate the ODK_Conf table (see configODK)."""
+
+        queryODK = _fetchConfigRow(c, _SQL_ODK, "ODK_Conf", ODKConfigurationError)
+        (
+            odkID,
+            odkURL,
+            odkUser,
+            odkPassword,
+            odkFormID,
+            odkLastRun,
+            odkUseCentral,
+            odkProjectNumber,
+        ) = queryODK
+        if not _validURL(odkURL):
+            raise _configError(ODKConfigurationError, "ODK_Conf.odkURL")
+        # (add odkLastRunResult to _SQL_ODK before enabling this check)
         # if not odkLastRunResult in ("success", "fail"):
         #     raise ODKConfigurationError \
         #         ("Problem in database: ODK_Conf.odkLastRunResult")
-        odkLastRunDate = datetime.datetime.strptime(
-            odkLastRun, "%Y-%m-%d_%H:%M:%S"
-        ).strftime("%Y/%m/%d")
-        odkLastRunDatePrev = (
-            datetime.datetime.strptime(odkLastRunDate, "%Y/%m/%d")
-            - datetime.timedelta(days=1)
-        ).strftime("%Y/%m/%d")
-
-        ntODK = collections.namedtuple(
-            "ntODK",
-            [
-                "odkID",
-                "odkURL",
-                "odkUser",
-                "odkPassword",
-                "odkFormID",
-                "odkLastRun",
-                # "odkLastRunResult",
-                "odkLastRunDate",
-                "odkLastRunDatePrev",
-                "odkUseCentral",
-                "odkProjectNumber",
-            ],
-        )
-        settingsODK = ntODK(
+        # strptime (unlike SQLite's date functions) rejects impossible dates
+        # and times as well as trailing text
+        try:
+            odkLastRunDT = datetime.datetime.strptime(
+                odkLastRun, "%Y-%m-%d_%H:%M:%S"
+            )
+            odkLastRunDate = odkLastRunDT.strftime("%Y/%m/%d")
+            odkLastRunDatePrev = (
+                odkLastRunDT - datetime.timedelta(days=1)
+            ).strftime("%Y/%m/%d")
+        except (TypeError, ValueError, OverflowError):
+            raise _configError(
+                ODKConfigurationError,
+                "ODK_Conf.odkLastRun",
+                "should look like '1900-01-01_00:00:01'",
+            )
+
+        return ntODK(
             odkID,
             odkURL,
             odkUser,
             odkPassword,
             odkFormID,
             odkLastRun,
-            # odkLastRunResult,
             odkLastRunDate,
             odkLastRunDatePrev,
             odkUseCentral,
             odkProjectNumber,
         )
 
-        return settingsODK
-
     def updateODKLastRun(self, conn, plRunDate):
         """Update Transfer Database table ODK_Conf.odkLastRun
 
@@ -248,10 +718,9 @@ class TransferDB:
         :type plRunDate: date (YYYY-MM-DD_hh:mm:ss)
         """
 
-        c = conn.cursor()
-        sql = "UPDATE ODK_Conf SET odkLastRun = ?"
+        c = self._getCursor(conn)
         par = (plRunDate,)
-        c.execute(sql, par)
+        c.execute(_SQL_UPDATE_ODK_LAST_RUN, par)
         conn.commit()
 
     def checkDuplicates(self, conn):
@@ -270,25 +739,20 @@ class TransferDB:
 
         if self.workingDirectory is None:
             raise PipelineError("Need to run configPipeline.")
-        c = conn.cursor()
+        c = self._getCursor(conn)
         odkBCExportPath = os.path.join(
             self.workingDirectory, "ODKFiles", "odkBCExportNew.csv"
         )
         dfODK = read_csv(odkBCExportPath)
         dfODKID = dfODK["meta-instanceID"]
 
-        sql = "SELECT id FROM VA_Storage"
-        c.execute(sql)
+        c.execute(_SQL_VA_IDS)
         vaIDs = c.fetchall()
         vaIDsList = [j for i in vaIDs for j in i]
         vaDuplicates = set(dfODKID).intersection(set(vaIDsList))
         timeFMT = datetime.datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
         if len(vaDuplicates) > 0:
             nDuplicates = len(vaDuplicates)
-            sqlXferDB = (
-                "INSERT INTO EventLog "
-                "(eventDesc, eventType, eventTime) VALUES (?, ?, ?)"
-            )
             eventDescPart1 = [
                 "Removing duplicate records from ODK Export with"
                 + "ODK Meta-Instance ID: "
@@ -298,7 +762,7 @@ class TransferDB:
             eventType = ["Warning"] * nDuplicates
             eventTime = [timeFMT] * nDuplicates
             par = list(zip(eventDesc, eventType, eventTime))
-            c.executemany(sqlXferDB, par)
+            c.executemany(_SQL_INSERT_EVENT, par)
             conn.commit()
             df_no_duplicates = dfODK[~dfODK["meta-instanceID"].isin(list(vaDuplicates))]
             try:
@@ -336,29 +800,31 @@ class TransferDB:
         :raises: OpenVAConfigurationError
         """
 
+        return self._openVASettings(self._getCursor(conn), algorithm, pipelineDir)
+
+    def _openVASettings(self, c, algorithm, pipelineDir):
+        """Return (cached) settings for algorithm (see configOpenVA)."""
+
         if algorithm == "InterVA":
-            settingsInterVA = self._configInterVA(conn, pipelineDir)
-            return settingsInterVA
+            loader = self._configInterVA
         elif algorithm == "InSilicoVA":
-            settingsInSilicoVA = self._configInSilicoVA(conn, pipelineDir)
-            return settingsInSilicoVA
+            loader = self._configInSilicoVA
         elif algorithm == "SmartVA":
-            settingsSmartVA = self._configSmartVA(conn, pipelineDir)
-            return settingsSmartVA
+            loader = self._configSmartVA
         else:
             raise PipelineConfigurationError(
                 "Not an acceptable parameter for 'algorithm'."
             )
+        return self._cachedConfig(c, algorithm, loader, pipelineDir)
 
-    def _configInterVA(self, conn, pipelineDir):
+    def _configInterVA(self, c, pipelineDir):
         """Query OpenVA configuration settings from database.
 
         This method is called by configOpenVA when the VA algorithm is either
         InterVA4 or InterVA5.
 
-        :param conn: A connection to the Transfer Database (e.g. the object
-          returned from :meth:`TransferDB.connectDB() <connectDB>`.)
-        :type conn: sqlite3 Connection object
+        :param c: A cursor on the Transfer Database.
+        :type c: sqlite3 Cursor object
         :param pipelineDir: Working directory for the Pipeline
         :type pipelineDir: str
         :returns: Contains all parameters needed for
@@ -367,116 +833,21 @@ class TransferDB:
         :raises: OpenVAConfigurationError
         """
 
-        c = conn.cursor()
-
-        try:
-            sqlInterVA = "SELECT version, HIV, Malaria FROM InterVA_Conf;"
-            queryInterVA = c.execute(sqlInterVA).fetchall()
-        except (sqlcipher.OperationalError) as e:
-            raise PipelineConfigurationError(
-                "Problem in database table InterVA_Conf..." + str(e)
-            )
-
-        # Database Table: InterVA_Conf
-        intervaVersion = queryInterVA[0][0]
-        if not intervaVersion in ("4", "5"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InterVA_Conf.version "
-                "(valid options: '4' or '5')."
-            )
-        intervaHIV = queryInterVA[0][1]
-        if not intervaHIV in ("v", "l", "h"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InterVA_Conf.HIV "
-                "(valid options: 'v', 'l', or 'h')."
-            )
-        intervaMalaria = queryInterVA[0][2]
-        if not intervaMalaria in ("v", "l", "h"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InterVA_Conf.Malaria "
-                "(valid options: 'v', 'l', or 'h')."
-            )
-
-        # Database Table: Advanced_InterVA_Conf
-        try:
-            sqlAdvancedInterVA = (
-                "SELECT output, append, groupcode, "
-                "replicate, replicate_bug1, replicate_bug2 "
-                "FROM Advanced_InterVA_Conf;"
-            )
-            queryAdvancedInterVA = c.execute(sqlAdvancedInterVA).fetchall()
-        except (sqlcipher.OperationalError) as e:
-            raise PipelineConfigurationError(
-                "Problem in database table Advanced_InterVA_Conf..." + str(e)
-            )
-
-        intervaOutput = queryAdvancedInterVA[0][0]
-        if not intervaOutput in ("classic", "extended"):
-            raise OpenVAConfigurationError(
-                "Problem in database: Advanced_InterVA_Conf.output."
-            )
-        intervaAppend = queryAdvancedInterVA[0][1]
-        if not intervaAppend in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: Advanced_InterVA_Conf.append."
-            )
-        intervaGroupcode = queryAdvancedInterVA[0][2]
-        if not intervaGroupcode in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: Advanced_InterVA_Conf.groupcode."
-            )
-        intervaReplicate = queryAdvancedInterVA[0][3]
-        if not intervaReplicate in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: Advanced_InterVA_Conf.replicate."
-            )
-        intervaReplicateBug1 = queryAdvancedInterVA[0][4]
-        if not intervaReplicateBug1 in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: Advanced_InterVA_Conf.replicate_bug1."
-            )
-        intervaReplicateBug2 = queryAdvancedInterVA[0][5]
-        if not intervaReplicateBug2 in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: Advanced_InterVA_Conf.replicate_bug2."
-            )
-
-        ntInterVA = collections.namedtuple(
-            "ntInterVA",
-            [
-                "InterVA_Version",
-                "InterVA_HIV",
-                "InterVA_Malaria",
-                "InterVA_output",
-                "InterVA_append",
-                "InterVA_groupcode",
-                "InterVA_replicate",
-                "InterVA_replicate_bug1",
-                "InterVA_replicate_bug2",
-            ],
-        )
-        settingsInterVA = ntInterVA(
-            intervaVersion,
-            intervaHIV,
-            intervaMalaria,
-            intervaOutput,
-            intervaAppend,
-            intervaGroupcode,
-            intervaReplicate,
-            intervaReplicateBug1,
-            intervaReplicateBug2,
+        # Database Tables: InterVA_Conf and Advanced_InterVA_Conf
+        queryInterVA = _fetchConfigRow(
+            c, _SQL_INTERVA, "InterVA_Conf/Advanced_InterVA_Conf"
         )
-        return settingsInterVA
+        _validateRow(queryInterVA, _INTERVA_SPEC, OpenVAConfigurationError)
+        return ntInterVA._make(queryInterVA)
 
-    def _configInSilicoVA(self, conn, pipelineDir):
+    def _configInSilicoVA(self, c, pipelineDir):
         """Query OpenVA configuration settings from database.
 
         This method is called by configOpenVA when the VA algorithm is
         InSilicoVA.
 
-        :param conn: A connection to the Transfer Database (e.g. the object
-          returned from :meth:`TransferDB.connectDB() <connectDB>`.)
-        :type conn: sqlite3 Connection object
+        :param c: A cursor on the Transfer Database.
+        :type c: sqlite3 Cursor object
         :param pipelineDir: Working directory for the Pipeline
         :type pipelineDir: str
         :returns: Contains all parameters needed for
@@ -485,393 +856,21 @@ class TransferDB:
         :raises: OpenVAConfigurationError
         """
 
-        c = conn.cursor()
-
-        # Database Table: InSilicoVA_Conf
-        try:
-            sqlInSilicoVA = "SELECT data_type, Nsim FROM InSilicoVA_Conf;"
-            queryInSilicoVA = c.execute(sqlInSilicoVA).fetchall()
-        except (sqlcipher.OperationalError) as e:
-            raise PipelineConfigurationError(
-                "Problem in database table InSilicoVA_Conf..." + str(e)
-            )
-
-        insilicovaDataType = queryInSilicoVA[0][0]
-        if not insilicovaDataType in ("WHO2012", "WHO2016"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.data_type "
-                "(valid options: 'WHO2012' or 'WHO2016')."
-            )
-        insilicovaNsim = queryInSilicoVA[0][1]
-        if insilicovaNsim in ("", None):
-            raise OpenVAConfigurationError("Problem in database: InSilicoVA_Conf.Nsim")
-
-        # Database Table: Advanced_InSilicoVA_Conf
-        try:
-            sqlAdvancedInSilicoVA = (
-                "SELECT isNumeric, updateCondProb, "
-                "keepProbbase_level, CondProb, "
-                "CondProbNum, datacheck, "
-                "datacheck_missing, external_sep, thin, "
-                "burnin, auto_length, conv_csmf, "
-                "jump_scale, levels_prior, "
-                "levels_strength, trunc_min, trunc_max, "
-                "subpop, java_option, seed, phy_code, "
-                "phy_cat, phy_unknown, phy_external, "
-                "phy_debias, exclude_impossible_cause, "
-                "no_is_missing, indiv_CI, groupcode "
-                "FROM Advanced_InSilicoVA_Conf;"
-            )
-            queryAdvancedInSilicoVA = c.execute(sqlAdvancedInSilicoVA).fetchall()
-        except (sqlcipher.OperationalError) as e:
-            raise PipelineConfigurationError(
-                "Problem in database table Advanced_InSilicoVA_Conf..." + str(e)
-            )
-
-        insilicovaIsNumeric = queryAdvancedInSilicoVA[0][0]
-        if not insilicovaIsNumeric in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.isNumeric "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-        insilicovaUpdateCondProb = queryAdvancedInSilicoVA[0][1]
-        if not insilicovaUpdateCondProb in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.updateCondProb "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-        insilicovaKeepProbbaseLevel = queryAdvancedInSilicoVA[0][2]
-        if not insilicovaKeepProbbaseLevel in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.keepProbbase_level "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-        insilicovaCondProb = queryAdvancedInSilicoVA[0][3]
-        if insilicovaCondProb in ("", None):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.CondProb "
-                "(valid options: name of R object)."
-            )
-        insilicovaCondProbNum = queryAdvancedInSilicoVA[0][4]
-        if not insilicovaCondProbNum == "NULL":
-            try:
-                floatCondProbNum = float(insilicovaCondProbNum)
-            except ValueError:
-                raise OpenVAConfigurationError(
-                    "Problem in database: InSilicoVA_Conf.CondProbNum "
-                    "(must be between '0' and '1')."
-                )
-            if not (0 <= floatCondProbNum <= 1):
-                raise OpenVAConfigurationError(
-                    "Problem in database: InSilicoVA_Conf.CondProbNum "
-                    "(must be between '0' and '1')."
-                )
-        insilicovaDatacheck = queryAdvancedInSilicoVA[0][5]
-        if not insilicovaDatacheck in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.datacheck "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-        insilicovaDatacheckMissing = queryAdvancedInSilicoVA[0][6]
-        if not insilicovaDatacheckMissing in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.datacheck_missing "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-        insilicovaExternalSep = queryAdvancedInSilicoVA[0][7]
-        if not insilicovaExternalSep in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.external_sep "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-        insilicovaThin = queryAdvancedInSilicoVA[0][8]
-        try:
-            thinFloat = float(insilicovaThin)
-        except ValueError:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.thin " "(must be 'thin' > 0."
-            )
-        if thinFloat <= 0:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.thin " "(must be 'thin' > 0."
-            )
-        insilicovaBurnin = queryAdvancedInSilicoVA[0][9]
-        try:
-            burninFloat = float(insilicovaBurnin)
-        except ValueError:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.burnin " "(must be 'burnin' > 0."
-            )
-        if burninFloat <= 0:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.burnin " "(must be 'burnin' > 0."
-            )
-        insilicovaAutoLength = queryAdvancedInSilicoVA[0][10]
-        if not insilicovaAutoLength in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.auto_length "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-        insilicovaConvCSMF = queryAdvancedInSilicoVA[0][11]
-        try:
-            floatConvCSMF = float(insilicovaConvCSMF)
-        except ValueError:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.conv_csmf "
-                "(must be between '0' and '1')."
-            )
-        if not (0 <= floatConvCSMF <= 1):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.conv_csmf "
-                "(must be between '0' and '1')."
-            )
-        insilicovaJumpScale = queryAdvancedInSilicoVA[0][12]
-        try:
-            floatJumpScale = float(insilicovaJumpScale)
-        except ValueError:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.jump_scale "
-                "(must be greater than '0')."
-            )
-        if floatJumpScale <= 0:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.jump_scale "
-                "(must be greater than '0')."
-            )
-        insilicovaLevelsPrior = queryAdvancedInSilicoVA[0][13]
-        if insilicovaLevelsPrior in ("", None):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.levels_prior "
-                "(valid options: name of R object)."
-            )
-        insilicovaLevelsStrength = queryAdvancedInSilicoVA[0][14]
-        try:
-            floatLevelsStrength = float(insilicovaLevelsStrength)
-        except ValueError:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.levels_strength "
-                "(must be greater than '0')."
-            )
-        if floatLevelsStrength <= 0:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.levels_strength "
-                "(must be greater than '0')."
-            )
-        insilicovaTruncMin = queryAdvancedInSilicoVA[0][15]
-        try:
-            floatTruncMin = float(insilicovaTruncMin)
-        except ValueError:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.trunc_min "
-                "(must be between '0' and '1')."
-            )
-        if not (0 <= floatTruncMin <= 1):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.trunc_min "
-                "(must be between '0' and '1')."
-            )
-        insilicovaTruncMax = queryAdvancedInSilicoVA[0][16]
-        try:
-            floatTruncMax = float(insilicovaTruncMax)
-        except ValueError:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.trunc_max "
-                "(must be between '0' and '1')."
-            )
-        if not (0 <= floatTruncMax <= 1):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.trunc_max "
-                "(must be between '0' and '1')."
-            )
-        insilicovaSubpop = queryAdvancedInSilicoVA[0][17]
-        if insilicovaSubpop in ("", None):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.subpop "
-                "(valid options: name of R object)."
-            )
-        insilicovaJavaOption = queryAdvancedInSilicoVA[0][18]
-        if insilicovaJavaOption == "" or len(insilicovaJavaOption) < 6:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.java_option "
-                "(should look like '-Xmx1g')."
-            )
-        joLength = len(insilicovaJavaOption)
-        joLastChar = insilicovaJavaOption[(joLength - 1)]
-        joFirst4Char = insilicovaJavaOption[0:4]
-        joMemSize = insilicovaJavaOption[4 : (joLength - 1)]
-        if not joFirst4Char == "-Xmx":
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.java_option "
-                "(should start with '-Xmx')."
-            )
-        if not joLastChar in ("m", "g"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.java_option "
-                "(should end with 'g' for gigabyts or 'm' for megabytes)."
-            )
-        try:
-            float_joMemSize = float(joMemSize)
-        except ValueError:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.java_option "
-                "(should look like '-Xmx1g')."
-            )
-        if float_joMemSize <= 0:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.java_option "
-                "(should look like '-Xmx1g')."
-            )
-        insilicovaSeed = queryAdvancedInSilicoVA[0][19]
-        try:
-            float(insilicovaSeed)
-        except:
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.seed "
-                "(must be between a number; preferably an integer)."
-            )
-        insilicovaPhyCode = queryAdvancedInSilicoVA[0][20]
-        if insilicovaPhyCode in ("", None):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.phy_code "
-                "(valid options: name of R object)."
-            )
-        insilicovaPhyCat = queryAdvancedInSilicoVA[0][21]
-        if insilicovaPhyCat in ("", None):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.phy_cat "
-                "(valid options: name of R object)."
-            )
-        insilicovaPhyUnknown = queryAdvancedInSilicoVA[0][22]
-        if insilicovaPhyUnknown in ("", None):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.phy_unknown "
-                "(valid options: name of R object)."
-            )
-        insilicovaPhyExternal = queryAdvancedInSilicoVA[0][23]
-        if insilicovaPhyExternal in ("", None):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.phy_external "
-                "(valid options: name of R object)."
-            )
-        insilicovaPhyDebias = queryAdvancedInSilicoVA[0][24]
-        if insilicovaPhyDebias in ("", None):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.phy_debias "
-                "(valid options: name of R object)."
-            )
-        insilicovaExcludeImpossibleCause = queryAdvancedInSilicoVA[0][25]
-        if not insilicovaExcludeImpossibleCause in ("subset", "all", "InterVA", "none"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.exclude_impossible_cause "
-                "(valid options: 'subset', 'all', 'InterVA', and 'none')."
-            )
-        insilicovaNoIsMissing = queryAdvancedInSilicoVA[0][26]
-        if not insilicovaNoIsMissing in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.no_is_missing "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-        insilicovaIndivCI = queryAdvancedInSilicoVA[0][27]
-        if not insilicovaIndivCI == "NULL":
-            try:
-                floatIndivCI = float(insilicovaIndivCI)
-            except ValueError:
-                raise OpenVAConfigurationError(
-                    "Problem in database: InSilicoVA_Conf.indiv_CI "
-                    "(must be between '0' and '1')."
-                )
-            if not (0 < floatIndivCI < 1):
-                raise OpenVAConfigurationError(
-                    "Problem in database: InSilicoVA_Conf.indiv_CI "
-                    "(must be between '0' and '1')."
-                )
-        insilicovaGroupcode = queryAdvancedInSilicoVA[0][28]
-        if not insilicovaGroupcode in ("TRUE", "FALSE"):
-            raise OpenVAConfigurationError(
-                "Problem in database: InSilicoVA_Conf.groupcode "
-                "(valid options: 'TRUE' or 'FALSE')."
-            )
-
-        ntInSilicoVA = collections.namedtuple(
-            "ntInSilicoVA",
-            [
-                "InSilicoVA_data_type",
-                "InSilicoVA_Nsim",
-                "InSilicoVA_isNumeric",
-                "InSilicoVA_updateCondProb",
-                "InSilicoVA_keepProbbase_level",
-                "InSilicoVA_CondProb",
-                "InSilicoVA_CondProbNum",
-                "InSilicoVA_datacheck",
-                "InSilicoVA_datacheck_missing",
-                "InSilicoVA_external_sep",
-                "InSilicoVA_thin",
-                "InSilicoVA_burnin",
-                "InSilicoVA_auto_length",
-                "InSilicoVA_conv_csmf",
-                "InSilicoVA_jump_scale",
-                "InSilicoVA_levels_prior",
-                "InSilicoVA_levels_strength",
-                "InSilicoVA_trunc_min",
-                "InSilicoVA_trunc_max",
-                "InSilicoVA_subpop",
-                "InSilicoVA_java_option",
-                "InSilicoVA_seed",
-                "InSilicoVA_phy_code",
-                "InSilicoVA_phy_cat",
-                "InSilicoVA_phy_unknown",
-                "InSilicoVA_phy_external",
-                "InSilicoVA_phy_debias",
-                "InSilicoVA_exclude_impossible_cause",
-                "InSilicoVA_no_is_missing",
-                "InSilicoVA_indiv_CI",
-                "InSilicoVA_groupcode",
-            ],
+        # Database Tables: InSilicoVA_Conf and Advanced_InSilicoVA_Conf
+        queryInSilicoVA = _fetchConfigRow(
+            c, _SQL_INSILICOVA, "InSilicoVA_Conf/Advanced_InSilicoVA_Conf"
         )
-        settingsInSilicoVA = ntInSilicoVA(
-            insilicovaDataType,
-            insilicovaNsim,
-            insilicovaIsNumeric,
-            insilicovaUpdateCondProb,
-            insilicovaKeepProbbaseLevel,
-            insilicovaCondProb,
-            insilicovaCondProbNum,
-            insilicovaDatacheck,
-            insilicovaDatacheckMissing,
-            insilicovaExternalSep,
-            insilicovaThin,
-            insilicovaBurnin,
-            insilicovaAutoLength,
-            insilicovaConvCSMF,
-            insilicovaJumpScale,
-            insilicovaLevelsPrior,
-            insilicovaLevelsStrength,
-            insilicovaTruncMin,
-            insilicovaTruncMax,
-            insilicovaSubpop,
-            insilicovaJavaOption,
-            insilicovaSeed,
-            insilicovaPhyCode,
-            insilicovaPhyCat,
-            insilicovaPhyUnknown,
-            insilicovaPhyExternal,
-            insilicovaPhyDebias,
-            insilicovaExcludeImpossibleCause,
-            insilicovaNoIsMissing,
-            insilicovaIndivCI,
-            insilicovaGroupcode,
-        )
-        return settingsInSilicoVA
+        _validateRow(queryInSilicoVA, _INSILICOVA_SPEC, OpenVAConfigurationError)
+        return ntInSilicoVA._make(queryInSilicoVA)
 
-    def _configSmartVA(self, conn, pipelineDir):
+    def _configSmartVA(self, c, pipelineDir):
         """Query OpenVA configuration settings from database.
 
         This method is called by configOpenVA when the VA algorithm is
         SmartVA.
 
-        :param conn: A connection to the Transfer Database (e.g. the object
-          returned from :meth:`TransferDB.connectDB() <connectDB>`.)
-        :type conn: sqlite3 Connection object
+        :param c: A cursor on the Transfer Database.
+        :type c: sqlite3 Cursor object
         :param pipelineDir: Working directory for the Pipeline
         :type pipelineDir: str
         :returns: Contains all parameters needed for OpenVA.setAlgorithmParameters().
@@ -879,71 +878,23 @@ class TransferDB:
         :raises: OpenVAConfigurationError
         """
 
-        c = conn.cursor()
+        querySmartVA = _fetchConfigRow(c, _SQL_SMARTVA, "SmartVA_Conf")
+        _validateRow(querySmartVA, _SMARTVA_SPEC, OpenVAConfigurationError)
 
+        # the country check looks up the one abbreviation in SmartVA_Country
+        # (another query, so it runs last)
+        sqlcipher = self._dbapi()
         try:
-            sqlSmartVA = (
-                "SELECT country, hiv, malaria, hce, freetext, "
-                "figures, language FROM SmartVA_Conf;"
-            )
-            querySmartVA = c.execute(sqlSmartVA).fetchall()
-        except (sqlcipher.OperationalError) as e:
-            raise PipelineConfigurationError(
-                "Problem in database table SmartVA_Conf..." + str(e)
-            )
-
-        try:
-            sqlCountryList = "SELECT abbrev FROM SmartVA_Country;"
-            queryCountryList = c.execute(sqlCountryList).fetchall()
+            c.execute(_SQL_SMARTVA_COUNTRY, (querySmartVA[0],))
+            countryFound = c.fetchone() is not None
         except (sqlcipher.OperationalError) as e:
             raise PipelineConfigurationError(
                 "Problem in database table SmartVA_Country..." + str(e)
             )
+        if not countryFound:
+            raise _configError(OpenVAConfigurationError, "SmartVA_Conf.country")
 
-        smartvaCountry = querySmartVA[0][0]
-        if smartvaCountry not in [j for i in queryCountryList for j in i]:
-            raise OpenVAConfigurationError("Problem in database: SmartVA_Conf.country")
-        smartvaHIV = querySmartVA[0][1]
-        if not smartvaHIV in ("True", "False"):
-            raise OpenVAConfigurationError("Problem in database: SmartVA_Conf.hiv")
-        smartvaMalaria = querySmartVA[0][2]
-        if not smartvaMalaria in ("True", "False"):
-            raise OpenVAConfigurationError("Problem in database: SmartVA_Conf.malaria")
-        smartvaHCE = querySmartVA[0][3]
-        if not smartvaHCE in ("True", "False"):
-            raise OpenVAConfigurationError("Problem in database: SmartVA_Conf.hce")
-        smartvaFreetext = querySmartVA[0][4]
-        if not smartvaFreetext in ("True", "False"):
-            raise OpenVAConfigurationError("Problem in database: SmartVA_Conf.freetext")
-        smartvaFigures = querySmartVA[0][5]
-        if not smartvaFigures in ("True", "False"):
-            raise OpenVAConfigurationError("Problem in database: SmartVA_Conf.figures")
-        smartvaLanguage = querySmartVA[0][6]
-        if not smartvaLanguage in ("english", "chinese", "spanish"):
-            raise OpenVAConfigurationError("Problem in database: SmartVA_Conf.language")
-
-        ntSmartVA = collections.namedtuple(
-            "ntSmartVA",
-            [
-                "SmartVA_country",
-                "SmartVA_hiv",
-                "SmartVA_malaria",
-                "SmartVA_hce",
-                "SmartVA_freetext",
-                "SmartVA_figures",
-                "SmartVA_language",
-            ],
-        )
-        settingsSmartVA = ntSmartVA(
-            smartvaCountry,
-            smartvaHIV,
-            smartvaMalaria,
-            smartvaHCE,
-            smartvaFreetext,
-            smartvaFigures,
-            smartvaLanguage,
-        )
-        return settingsSmartVA
+        return ntSmartVA._make(querySmartVA)
 
     def configDHIS(self, conn, algorithm):
         """Query DHIS configuration settings from database.
@@ -968,61 +919,114 @@ class TransferDB:
         :rtype: tuple
         :raises: DHISConfigurationError
         """
-        c = conn.cursor()
-        try:
-            sqlDHIS = (
-                "SELECT dhisURL, dhisUser, dhisPassword, dhisOrgUnit " "FROM DHIS_Conf;"
-            )
-            queryDHIS = c.execute(sqlDHIS).fetchall()
-        except (sqlcipher.OperationalError) as e:
-            raise PipelineConfigurationError(
-                "Problem in database table DHIS_Conf..." + str(e)
-            )
+
+        settingsDHIS, dhisCODCodes = self._cachedConfig(
+            self._getCursor(conn), "DHIS_Conf", self._configDHIS, algorithm
+        )
+        return [settingsDHIS, dhisCODCodes]
+
+    def _configDHIS(self, c, algorithm):
+        """Query and validate the DHIS_Conf table (see configDHIS)."""
+
+        queryDHIS = _fetchConfigRow(c, _SQL_DHIS, "DHIS_Conf")
 
         if algorithm == "SmartVA":
-            sqlCODCodes = (
-                "SELECT codName, codCode FROM COD_Codes_DHIS WHERE "
-                "codSource = 'Tariff'"
-            )
+            par = ("Tariff",)
         else:
-            sqlCODCodes = (
-                "SELECT codName, codCode FROM COD_Codes_DHIS WHERE " "codSource = 'WHO'"
-            )
+            par = ("WHO",)
+        sqlcipher = self._dbapi()
         try:
-            queryCODCodes = c.execute(sqlCODCodes).fetchall()
+            queryCODCodes = c.execute(_SQL_COD_CODES, par).fetchall()
             dhisCODCodes = dict(queryCODCodes)
         except (sqlcipher.OperationalError) as e:
             raise DHISConfigurationError(
                 "Problem in database table COD_Codes_DHIS..." + str(e)
             )
 
-        dhisURL = queryDHIS[0][0]
-        startHTML = dhisURL[0:7]
-        startHTMLS = dhisURL[0:8]
-        if not (startHTML == "http://" or startHTMLS == "https://"):
-            raise DHISConfigurationError("Problem in database: DHIS_Conf.dhisURL")
-        dhisUser = queryDHIS[0][1]
-        if dhisUser == "" or dhisUser is None:
-            raise DHISConfigurationError(
-                "Problem in database: DHIS_Conf.dhisUser (is empty)"
-            )
-        dhisPassword = queryDHIS[0][2]
-        if dhisPassword == "" or dhisPassword is None:
-            raise DHISConfigurationError(
-                "Problem in database: DHIS_Conf.dhisPassword (is empty)"
-            )
-        dhisOrgUnit = queryDHIS[0][3]
-        if dhisOrgUnit == "" or dhisOrgUnit is None:
-            raise DHISConfigurationError(
-                "Problem in database: DHIS_Conf.dhisOrgUnit (is empty)"
-            )
+        _validateRow(queryDHIS, _DHIS_SPEC, DHISConfigurationError)
+        return (ntDHIS._make(queryDHIS), dhisCODCodes)
 
-        ntDHIS = collections.namedtuple(
-            "ntDHIS", ["dhisURL", "dhisUser", "dhisPassword", "dhisOrgUnit"]
-        )
-        settingsDHIS = ntDHIS(dhisURL, dhisUser, dhisPassword, dhisOrgUnit)
+    def loadAllConfig(self, conn, useDHIS=True):
+        """Query all configuration settings needed for a Pipeline run.
 
-        return [settingsDHIS, dhisCODCodes]
+        This method reads the settings returned by
+        :meth:`configPipeline`, :meth:`configODK`, :meth:`configOpenVA` (for
+        the algorithm named in Pipeline_Conf), and (optionally)
+        :meth:`configDHIS`, running all of the queries on a single cursor
+        inside one read transaction (so they see one consistent snapshot of
+        the database).  If conn already has an open transaction, the queries
+        run inside it instead.
+
+        :param conn: A connection to the Transfer Database (e.g. the object
+          returned from :meth:`TransferDB.connectDB() <connectDB>`.)
+        :type conn: sqlite3 Connection object
+        :param useDHIS: Indicator for including the DHIS2 settings.
+        :type useDHIS: bool
+        :returns: Configuration settings with keys "pipeline", "odk",
+          "openVA", and (if useDHIS is True) "dhis".
+        :rtype: dictionary
+        :raises: PipelineConfigurationError, ODKConfigurationError,
+          OpenVAConfigurationError, DHISConfigurationError
+        """
+
+        c = self._getCursor(conn)
+        ownTransaction = not conn.in_transaction
+        if ownTransaction:
+            stamp = self._dbStamp()
+            c.execute("BEGIN")
+            self._readSnapshot = stamp
+        try:
+            settingsPipeline = self._pipelineSettings(c)
+            algorithm = settingsPipeline.algorithm
+            settings = {
+                "pipeline": settingsPipeline,
+                "odk": self._cachedConfig(c, "ODK_Conf", self._configODK),
+                "openVA": self._openVASettings(
+                    c, algorithm, settingsPipeline.workingDirectory
+                ),
+            }
+            if useDHIS:
+                settingsDHIS, dhisCODCodes = self._cachedConfig(
+                    c, "DHIS_Conf", self._configDHIS, algorithm
+                )
+                settings["dhis"] = [settingsDHIS, dhisCODCodes]
+        finally:
+            if ownTransaction:
+                self._readSnapshot = None
+                conn.rollback()
+        return settings
+
+    def getCachedConfig(self, kind):
+        """Return one group of configuration settings on the pooled connection.
+
+        The settings are validated once and then reused until the Transfer
+        database changes on disk, so this method can be called for every VA
+        record without re-querying the database.
+
+        :param kind: Group of settings (one of the keys returned by
+          :meth:`loadAllConfig`): "pipeline", "odk", "openVA", or "dhis".
+        :type kind: str
+        :returns: The settings (see the corresponding config method).
+        :raises: PipelineConfigurationError, ODKConfigurationError,
+          OpenVAConfigurationError, DHISConfigurationError,
+          DatabaseConnectionError
+        """
+
+        c = self._getCursor(self.connectDB())
+        if kind == "odk":
+            return self._cachedConfig(c, "ODK_Conf", self._configODK)
+        settingsPipeline = self._pipelineSettings(c)
+        if kind == "pipeline":
+            return settingsPipeline
+        algorithm = settingsPipeline.algorithm
+        if kind == "openVA":
+            return self._openVASettings(c, algorithm, settingsPipeline.workingDirectory)
+        if kind == "dhis":
+            settingsDHIS, dhisCODCodes = self._cachedConfig(
+                c, "DHIS_Conf", self._configDHIS, algorithm
+            )
+            return [settingsDHIS, dhisCODCodes]
+        raise PipelineConfigurationError("Unknown configuration settings: " + str(kind))
 
     def storeVA(self, conn):
         """Store VA records in Transfer database.
@@ -1039,31 +1043,29 @@ class TransferDB:
 
         if self.workingDirectory is None:
             raise PipelineError("Need to run configPipeline.")
-        c = conn.cursor()
+        c = self._getCursor(conn)
         newStoragePath = os.path.join(
             self.workingDirectory, "OpenVAFiles", "newStorage.csv"
         )
-        dfNewStorage = read_csv(newStoragePath)
         timeFMT = datetime.datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+        sqlcipher = self._dbapi()
         try:
+            dfNewStorage = read_csv(newStoragePath)
+            par = []
             for row in dfNewStorage.itertuples():
                 xferDBID = row[1]
                 nElements = len(row) - 1
                 xferDBOutcome = row[nElements]
-                vaData = row[1], row[8 : (nElements - 1)]
-                vaDataFlat = tuple(
-                    [y for x in vaData for y in (x if isinstance(x, tuple) else (x,))]
-                )
+                vaDataFlat = (row[1],) + row[8 : (nElements - 1)]
                 xferDBRecord = dumps(vaDataFlat)
-                sqlXferDB = (
-                    "INSERT INTO VA_Storage "
-                    "(id, outcome, record, dateEntered) "
-                    "VALUES (?, ?, ?, ?)"
+                par.append(
+                    (xferDBID, xferDBOutcome, sqlite3.Binary(xferDBRecord), timeFMT)
                 )
-                par = [xferDBID, xferDBOutcome, sqlite3.Binary(xferDBRecord), timeFMT]
-                c.execute(sqlXferDB, par)
-            conn.commit()
-        except:
+            # all records are stored in one transaction (or none are)
+            with conn:
+                c.executemany(_SQL_INSERT_VA, par)
+        # read_csv raises OSError or ValueError (pandas parser errors)
+        except (OSError, ValueError, sqlcipher.Error):
             raise DatabaseConnectionError("Problem storing VA record to Transfer DB.")
 
     def makePipelineDirs(self):
@@ -1,12 +1,14 @@
 import os
+import re
 from codecs import open
-from setuptools import setup, find_packages
+from setuptools import setup
 
 here = os.path.abspath(os.path.dirname(__file__))
 
-about = {}
+# __version__.py only holds string assignments, so read them with a regex
+# instead of executing the file
 with open(os.path.join(here, "openva_pipeline", "__version__.py"), "r", "utf-8") as f:
-    exec(f.read(), about)
+    about = dict(re.findall(r"^(__\w+__)\s*=\s*['\"](.*?)['\"]", f.read(), re.M))
 
 with open("README.md", "r", "utf-8") as f:
     readme = f.read()
@@ -22,10 +24,11 @@ setup(
     long_description_content_type="text/markdown",
     url=about["__url__"],
     license=about["__license__"],
-    packages=find_packages(),
-    include_package_data=True,
+    # listed explicitly (find_packages() would also pick up tests/); the SQL
+    # schema is named in package_data so MANIFEST.in is only needed for sdists
+    packages=["openva_pipeline"],
     package_data={
-        "openva_pipeline": ["data/*"],
+        "openva_pipeline": ["data/*", "sql/*.sql"],
     },
     install_requires=[
         "pandas",
@@ -10,3 +10,12 @@ sys.path.insert(0,
                 )
 )
 import openva_pipeline
+
+
+def removeDB(dbFileName):
+    """Remove a test database together with its WAL (-wal/-shm) files."""
+
+    os.remove(dbFileName)
+    for suffix in ('-wal', '-shm'):
+        if os.path.isfile(dbFileName + suffix):
+            os.remove(dbFileName + suffix)
@@ -85,7 +85,7 @@ class Check_DHIS(unittest.TestCase):
         shutil.rmtree('DHIS/blobs/', ignore_errors = True)
         os.remove('OpenVAFiles/entityAttributeValue.csv')
         os.remove('OpenVAFiles/newStorage.csv')
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_DHIS_getCODCode(unittest.TestCase):
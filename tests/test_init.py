@@ -0,0 +1,48 @@
+import unittest
+import importlib
+import sys
+
+import context
+import openva_pipeline
+
+
+class Check_Lazy_Imports(unittest.TestCase):
+    """Test the names provided by the openva_pipeline package."""
+
+    def test_runPipeline_after_submodule(self):
+        """runPipeline should stay a function after importing its submodule."""
+
+        importlib.import_module('openva_pipeline.runPipeline')
+        self.assertIn('openva_pipeline.runPipeline', sys.modules)
+        self.assertTrue(callable(openva_pipeline.runPipeline))
+        from openva_pipeline import runPipeline
+        self.assertTrue(callable(runPipeline))
+
+    def test_version_after_submodule(self):
+        """__version__ should stay a string after importing its submodule."""
+
+        importlib.import_module('openva_pipeline.__version__')
+        self.assertIsInstance(openva_pipeline.__version__, str)
+        self.assertIsInstance(openva_pipeline.__title__, str)
+
+    def test_lazy_name(self):
+        """Public names should resolve to the objects in their submodules."""
+
+        from openva_pipeline.transferDB import TransferDB
+        self.assertIs(openva_pipeline.TransferDB, TransferDB)
+
+    def test_no_module_getattr(self):
+        """Lazy names should not rely on a module __getattr__ (Python 3.7+)."""
+
+        self.assertNotIn('__getattr__', vars(openva_pipeline))
+        self.assertIn('PipelineError', dir(openva_pipeline))
+
+    def test_unknown_name(self):
+        """Unknown names should raise AttributeError."""
+
+        with self.assertRaises(AttributeError):
+            openva_pipeline.notAName
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity = 2)
@@ -99,7 +99,7 @@ class Check_copyVA(unittest.TestCase):
         os.remove('ODKFiles/odkBCExportPrev.csv')
         os.remove('ODKFiles/odkBCExportNew.csv')
         os.remove('OpenVAFiles/openVA_input.csv')
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
         shutil.rmtree(
             os.path.join('OpenVAFiles', cls.staticRunDate),
             ignore_errors=True
@@ -169,7 +169,7 @@ class Check_zeroRecords(unittest.TestCase):
 
         os.remove('ODKFiles/odkBCExportPrev.csv')
         os.remove('ODKFiles/odkBCExportNew.csv')
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
         shutil.rmtree(
             os.path.join('OpenVAFiles', cls.staticRunDate),
             ignore_errors=True
@@ -191,7 +191,7 @@ class Check_InSilicoVA(unittest.TestCase):
         shutil.copy('ODKFiles/another_bc_export.csv',
                     'ODKFiles/odkBCExportNew.csv')
         if os.path.isfile('Check_InSilicoVA_Pipeline.db'):
-            os.remove('Check_InSilicoVA_Pipeline.db')
+            context.removeDB('Check_InSilicoVA_Pipeline.db')
         createTransferDB('Check_InSilicoVA_Pipeline.db', '.', 'enilepiP')
 
         # pipelineRunDate = datetime.datetime.now()
@@ -274,7 +274,7 @@ class Check_InSilicoVA(unittest.TestCase):
             os.remove("OpenVAFiles/recordStorage.csv")
         if os.path.isfile("OpenVAFiles/entityAttributeValue.csv"):
             os.remove("OpenVAFiles/entityAttributeValue.csv")
-        os.remove("Check_InSilicoVA_Pipeline.db")
+        context.removeDB("Check_InSilicoVA_Pipeline.db")
 
 
 class Check_InterVA(unittest.TestCase):
@@ -292,7 +292,7 @@ class Check_InterVA(unittest.TestCase):
         shutil.copy('ODKFiles/another_bc_export.csv',
                     'ODKFiles/odkBCExportNew.csv')
         if os.path.isfile('Check_InterVA_Pipeline.db'):
-            os.remove('Check_InterVA_Pipeline.db')
+            context.removeDB('Check_InterVA_Pipeline.db')
         createTransferDB('Check_InterVA_Pipeline.db', '.', 'enilepiP')
 
         # pipelineRunDate = datetime.datetime.now()
@@ -359,7 +359,7 @@ class Check_InterVA(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Check_InterVA_Pipeline.db')
+        context.removeDB('Check_InterVA_Pipeline.db')
         shutil.rmtree(
             os.path.join('OpenVAFiles', cls.staticRunDate),
             ignore_errors=True
@@ -455,7 +455,7 @@ class Check_SmartVA(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
         shutil.rmtree(
             os.path.join('OpenVAFiles', cls.staticRunDate),
             ignore_errors=True
@@ -140,10 +140,22 @@ class Check_Pipeline_config(unittest.TestCase):
 
         self.assertEqual(self.settingsDHIS[0].dhisOrgUnit, 'SCVeBskgiK6')
 
+    def test_config_shared_connection(self):
+        """Pipeline steps should reuse one Transfer DB connection."""
+
+        pl = Pipeline('Pipeline.db', '.', 'enilepiP', True)
+        pl.config()
+        conn = pl._transferDB().connectDB()
+        pl.logEvent('Check shared connection', 'Event')
+        self.assertIs(pl._transferDB().connectDB(), conn)
+        pl.closeDB()
+        self.assertIsNot(pl._transferDB().connectDB(), conn)
+        pl.closeDB()
+
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class DownloadAppsTests(unittest.TestCase):
@@ -176,7 +188,7 @@ class DownloadAppsTests(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_runODK_clean(unittest.TestCase):
@@ -222,7 +234,7 @@ class Check_runODK_clean(unittest.TestCase):
             os.remove('ODKFiles/odkBCExportNew.csv')
         if os.path.isfile('ODKFiles/odkBCExportPrev.csv'):
             os.remove('ODKFiles/odkBCExportPrev.csv')
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_runODK_with_exports(unittest.TestCase):
@@ -309,7 +321,7 @@ class Check_runODK_with_exports(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_storeResultsDB(unittest.TestCase):
@@ -384,7 +396,7 @@ class Check_storeResultsDB(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_runOpenVA(unittest.TestCase):
@@ -456,7 +468,7 @@ class Check_runOpenVA(unittest.TestCase):
             os.remove('ODKFiles/odkBCExportNew.csv')
         if os.path.isfile('ODKFiles/odkBCExportPrev.csv'):
             os.remove('ODKFiles/odkBCExportPrev.csv')
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_runOpenVA_zeroRecords(unittest.TestCase):
@@ -600,7 +612,7 @@ class Check_Pipeline_runOpenVA_InterVA(unittest.TestCase):
     def setUpClass(cls):
 
         if os.path.isfile('InterVA_Pipeline.db'):
-            os.remove('InterVA_Pipeline.db')
+            context.removeDB('InterVA_Pipeline.db')
         createTransferDB('InterVA_Pipeline.db', '.', 'enilepiP')
         nowDate = datetime.datetime.now()
         pipelineRunDate = nowDate.strftime('%Y-%m-%d_%H:%M:%S')
@@ -672,7 +684,7 @@ class Check_Pipeline_runOpenVA_InterVA(unittest.TestCase):
         if os.path.isfile('OpenVAFiles/entityAttributeValue.csv'):
             os.remove('OpenVAFiles/entityAttributeValue.csv')
         if os.path.isfile('InterVA_Pipeline.db'):
-            os.remove('InterVA_Pipeline.db')
+            context.removeDB('InterVA_Pipeline.db')
 
 
 class Check_runOpenVA_SmartVA(unittest.TestCase):
@@ -808,7 +820,7 @@ class Check_Pipeline_runDHIS(unittest.TestCase):
             os.remove('OpenVAFiles/entityAttributeValue.csv')
         if os.path.isfile('OpenVAFiles/newStorage.csv'):
             os.remove('OpenVAFiles/newStorage.csv')
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_Pipeline_depositResults(unittest.TestCase):
@@ -869,7 +881,7 @@ class Check_Pipeline_depositResults(unittest.TestCase):
     def tearDownClass(cls):
         if os.path.isfile('OpenVAFiles/newStorage.csv'):
             os.remove('OpenVAFiles/newStorage.csv')
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_Pipeline_cleanPipeline(unittest.TestCase):
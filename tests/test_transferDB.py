@@ -10,6 +10,7 @@ from sys import path
 source_path = os.path.dirname(os.path.abspath(__file__))
 path.append(source_path)
 import context
+from openva_pipeline import transferDB
 from openva_pipeline.transferDB import TransferDB
 from openva_pipeline.runPipeline import createTransferDB
 from openva_pipeline.exceptions import DatabaseConnectionError
@@ -100,7 +101,7 @@ class Check_DB_Has_Tables(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_DB_Connection_Exceptions(unittest.TestCase):
@@ -115,6 +116,15 @@ class Check_DB_Connection_Exceptions(unittest.TestCase):
                             dbKey = 'enilepiP', plRunDate = pipelineRunDate)
         self.assertRaises(DatabaseConnectionError, xferDB.connectDB)
 
+    def test_dbFileMissing_notCreated(self):
+        """A missing DB file should raise an error (and not be created)."""
+
+        pipelineRunDate = datetime.datetime.now()
+        xferDB = TransferDB(dbFileName = 'missing_Pipeline.db', dbDirectory = '.',
+                            dbKey = 'enilepiP', plRunDate = pipelineRunDate)
+        self.assertRaises(DatabaseConnectionError, xferDB.connectDB)
+        self.assertFalse(os.path.isfile('missing_Pipeline.db'))
+
     def test_wrongKey_exception(self):
         """Pipeline should raise an error when the wrong key is used."""
 
@@ -123,6 +133,75 @@ class Check_DB_Connection_Exceptions(unittest.TestCase):
                             dbKey = 'wrong_dbKey', plRunDate = pipelineRunDate)
         self.assertRaises(DatabaseConnectionError, xferDB.connectDB)
 
+    def test_nullKey_exception(self):
+        """TransferDB should reject a key containing a null character."""
+
+        pipelineRunDate = datetime.datetime.now()
+        self.assertRaises(DatabaseConnectionError, TransferDB,
+                          dbFileName = 'Pipeline.db', dbDirectory = '.',
+                          dbKey = 'enile\0piP', plRunDate = pipelineRunDate)
+
+    def test_createTransferDB_roundTrip(self):
+        """TransferDB should open databases made by createTransferDB."""
+
+        hexKey = 'ab' * 32
+        pipelineRunDate = datetime.datetime.now()
+        for dbKey in (hexKey, "x'" + hexKey + "'", "enile'piP"):
+            if os.path.isfile('key_Pipeline.db'):
+                context.removeDB('key_Pipeline.db')
+            createTransferDB('key_Pipeline.db', '.', dbKey)
+            xferDB = TransferDB(dbFileName = 'key_Pipeline.db',
+                                dbDirectory = '.',
+                                dbKey = dbKey,
+                                plRunDate = pipelineRunDate)
+            try:
+                conn = xferDB.connectDB()
+                c = conn.execute('SELECT algorithm FROM Pipeline_Conf')
+                self.assertIn(c.fetchone()[0],
+                              ('InterVA', 'InSilicoVA', 'SmartVA'))
+            finally:
+                xferDB.close()
+                context.removeDB('key_Pipeline.db')
+
+    def test_pragmaKeyStatement(self):
+        """A 64-hex key is a passphrase unless written as x'...'."""
+
+        hexKey = 'ab' * 32
+        self.assertEqual(transferDB.pragmaKeyStatement(hexKey),
+                         "PRAGMA key = '" + hexKey + "';")
+        self.assertEqual(transferDB.pragmaKeyStatement("x'" + hexKey + "'"),
+                         "PRAGMA key = 'x''" + hexKey + "''';")
+
+
+class Check_DB_Connection_Reuse(unittest.TestCase):
+    """Test that connectDB reuses its (keyed) connection."""
+
+
+    def setUp(self):
+
+        pipelineRunDate = datetime.datetime.now()
+        self.xferDB = TransferDB(dbFileName = 'copy_Pipeline.db',
+                                 dbDirectory = '.',
+                                 dbKey = 'enilepiP',
+                                 plRunDate = pipelineRunDate)
+
+    def test_connectDB_reuses_connection(self):
+        """connectDB should return the same connection on repeated calls."""
+
+        conn = self.xferDB.connectDB()
+        self.assertIs(conn, self.xferDB.connectDB())
+        self.xferDB.close()
+
+    def test_connectDB_after_close(self):
+        """connectDB should reopen a connection closed by the caller."""
+
+        conn = self.xferDB.connectDB()
+        conn.close()
+        newConn = self.xferDB.connectDB()
+        self.assertIsNot(conn, newConn)
+        newConn.execute('SELECT odkURL FROM ODK_Conf;')
+        self.xferDB.close()
+
 
 class Check_Pipeline_Conf(unittest.TestCase):
     """Test methods that grab configuration settings for pipline."""
@@ -256,10 +335,19 @@ class Check_Pipeline_Conf(unittest.TestCase):
                           self.copy_xferDB.configPipeline, self.copy_conn)
         self.copy_conn.rollback()
 
+    def test_pipelineConf_Exception_noRows(self):
+        """configPipeline should fail if Pipeline_Conf is empty."""
+
+        c = self.copy_conn.cursor()
+        c.execute('DELETE FROM Pipeline_Conf')
+        self.assertRaises(PipelineConfigurationError,
+                          self.copy_xferDB.configPipeline, self.copy_conn)
+        self.copy_conn.rollback()
+
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_ODK_Conf(unittest.TestCase):
@@ -318,6 +406,25 @@ class Check_ODK_Conf(unittest.TestCase):
     def test_odkConf_odkLastRun(self):
         """Test ODK_Conf table has valid odkLastRun"""
         self.assertEqual(self.settingsODK.odkLastRun, '1900-01-01_00:00:01')
+    def test_odkConf_odkLastRun_Exception(self):
+        """configODK should fail with invalid odkLastRun."""
+        c = self.copy_conn.cursor()
+        sql = 'UPDATE ODK_Conf SET odkLastRun = ?'
+        par = ('wrong.date',)
+        c.execute(sql, par)
+        self.assertRaises(ODKConfigurationError,
+                          self.copy_xferDB.configODK, self.copy_conn)
+        self.copy_conn.rollback()
+    def test_odkConf_odkLastRun_invalidDate(self):
+        """configODK should fail with impossible or malformed odkLastRun."""
+        c = self.copy_conn.cursor()
+        sql = 'UPDATE ODK_Conf SET odkLastRun = ?'
+        for badDate in ('2021-02-29_10:00:00', '2020-02-30_10:00:00',
+                        '2020-01-01garbage', '2020-01-01_25:99:99'):
+            c.execute(sql, (badDate,))
+            self.assertRaises(ODKConfigurationError,
+                              self.copy_xferDB.configODK, self.copy_conn)
+        self.copy_conn.rollback()
 
     def test_odkConf_odkLastRunDate(self):
         """Test ODK_Conf table has valid odkLastRunDate"""
@@ -338,7 +445,7 @@ class Check_ODK_Conf(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_OpenVA_Conf_InterVA(unittest.TestCase):
@@ -521,7 +628,7 @@ class Check_OpenVA_Conf_InterVA(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_OpenVA_Conf_InSilicoVA(unittest.TestCase):
@@ -888,6 +995,17 @@ class Check_OpenVA_Conf_InSilicoVA(unittest.TestCase):
                           self.copy_conn, 'InSilicoVA',
                           self.settingsPipeline.workingDirectory)
         self.copy_conn.rollback()
+    def test_openvaConf_InSilicoVA_java_option_size_Exception(self):
+        """configOpenVA should fail with a bad InSilicoVA_Conf.java_option size."""
+        c = self.copy_conn.cursor()
+        sql = 'UPDATE Advanced_InSilicoVA_Conf SET java_option = ?'
+        for badOption in ('-Xmx0g', '-Xmx1k', '-Xmxg', '-Xmx1g '):
+            c.execute(sql, (badOption,))
+            self.assertRaises(OpenVAConfigurationError,
+                              self.copy_xferDB.configOpenVA,
+                              self.copy_conn, 'InSilicoVA',
+                              self.settingsPipeline.workingDirectory)
+        self.copy_conn.rollback()
 
     def test_openvaConf_InSilicoVA_seed(self):
         self.assertEqual(self.settingsOpenVA.InSilicoVA_seed, '1')
@@ -1018,6 +1136,21 @@ class Check_OpenVA_Conf_InSilicoVA(unittest.TestCase):
                           self.copy_conn, 'InSilicoVA',
                           self.settingsPipeline.workingDirectory)
         self.copy_conn.rollback()
+    def test_openvaConf_InSilicoVA_indiv_CI_range(self):
+        """indiv_CI should be a number strictly between 0 and 1."""
+        c = self.copy_conn.cursor()
+        sql = 'UPDATE Advanced_InSilicoVA_Conf SET indiv_CI = ?'
+        c.execute(sql, ('0.95',))
+        settings = self.copy_xferDB.configOpenVA(
+            self.copy_conn, 'InSilicoVA', self.settingsPipeline.workingDirectory)
+        self.assertEqual(settings.InSilicoVA_indiv_CI, '0.95')
+        for badCI in ('0', '1', '0.0', '1.5'):
+            c.execute(sql, (badCI,))
+            self.assertRaises(OpenVAConfigurationError,
+                              self.copy_xferDB.configOpenVA,
+                              self.copy_conn, 'InSilicoVA',
+                              self.settingsPipeline.workingDirectory)
+        self.copy_conn.rollback()
 
     def test_openvaConf_InSilicoVA_groupcode(self):
         self.assertIn(self.settingsOpenVA.InSilicoVA_groupcode, ('TRUE', 'FALSE'))
@@ -1036,7 +1169,7 @@ class Check_OpenVA_Conf_InSilicoVA(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_SmartVA_Conf(unittest.TestCase):
@@ -1177,7 +1310,7 @@ class Check_SmartVA_Conf(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_DHIS_Conf(unittest.TestCase):
@@ -1268,7 +1401,7 @@ class Check_DHIS_Conf(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_DHIS_storeVA(unittest.TestCase):
@@ -1310,10 +1443,40 @@ class Check_DHIS_storeVA(unittest.TestCase):
         s2 = set(dfNewStorageID)
         self.assertTrue(s2.issubset(s1))
 
+    def test_DHIS_storeVA_rollback(self):
+        """A record that cannot be stored should leave VA_Storage unchanged."""
+
+        dfNewStorage = read_csv('OpenVAFiles/newStorage.csv')
+        badID = dfNewStorage['id'][8]
+        c = self.conn.cursor()
+        c.execute('SELECT count(*) FROM VA_Storage')
+        nBefore = c.fetchone()[0]
+        c.execute("CREATE TEMP TRIGGER reject_va BEFORE INSERT ON VA_Storage "
+                  "WHEN NEW.id = '" + badID + "' "
+                  "BEGIN SELECT RAISE(ABORT, 'rejected'); END;")
+        try:
+            self.assertRaises(DatabaseConnectionError,
+                              self.xferDB.storeVA, self.conn)
+        finally:
+            c.execute('DROP TRIGGER reject_va')
+        c.execute('SELECT count(*) FROM VA_Storage')
+        self.assertEqual(c.fetchone()[0], nBefore)
+
+    def test_DHIS_storeVA_Exception(self):
+        """storeVA should raise an error if newStorage.csv is missing."""
+
+        os.rename('OpenVAFiles/newStorage.csv', 'OpenVAFiles/tmp_newStorage.csv')
+        try:
+            self.assertRaises(DatabaseConnectionError,
+                              self.xferDB.storeVA, self.conn)
+        finally:
+            os.rename('OpenVAFiles/tmp_newStorage.csv',
+                      'OpenVAFiles/newStorage.csv')
+
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
 
 
 class Check_updateODKLastRun(unittest.TestCase):
@@ -1357,7 +1520,158 @@ class Check_updateODKLastRun(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
 
-        os.remove('Pipeline.db')
+        context.removeDB('Pipeline.db')
+
+
+class Check_loadAllConfig(unittest.TestCase):
+    """Test method that grabs all configuration settings at once."""
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        pipelineRunDate = datetime.datetime.now()
+        cls.copy_xferDB = TransferDB(dbFileName = 'copy_Pipeline.db',
+                                     dbDirectory = '.',
+                                     dbKey = 'enilepiP',
+                                     plRunDate = pipelineRunDate)
+        cls.copy_conn = cls.copy_xferDB.connectDB()
+        cls.settings = cls.copy_xferDB.loadAllConfig(cls.copy_conn)
+
+    def test_loadAllConfig_matches_configX(self):
+        """loadAllConfig should agree with the individual config methods."""
+
+        settingsPipeline = self.copy_xferDB.configPipeline(self.copy_conn)
+        self.assertEqual(self.settings['pipeline'], settingsPipeline)
+        self.assertEqual(self.settings['odk'],
+                         self.copy_xferDB.configODK(self.copy_conn))
+        self.assertEqual(self.settings['openVA'],
+                         self.copy_xferDB.configOpenVA(
+                             self.copy_conn,
+                             settingsPipeline.algorithm,
+                             settingsPipeline.workingDirectory))
+        self.assertEqual(self.settings['dhis'],
+                         self.copy_xferDB.configDHIS(
+                             self.copy_conn, settingsPipeline.algorithm))
+
+    def test_loadAllConfig_without_DHIS(self):
+        """loadAllConfig should skip DHIS settings if useDHIS is False."""
+
+        settings = self.copy_xferDB.loadAllConfig(self.copy_conn,
+                                                  useDHIS = False)
+        self.assertNotIn('dhis', settings)
+
+    def test_loadAllConfig_transaction(self):
+        """loadAllConfig should close its own read transaction."""
+
+        self.copy_xferDB.loadAllConfig(self.copy_conn)
+        self.assertFalse(self.copy_conn.in_transaction)
+
+    def test_loadAllConfig_open_transaction(self):
+        """loadAllConfig should see uncommitted changes on the connection."""
+
+        c = self.copy_conn.cursor()
+        sql = 'UPDATE ODK_Conf SET odkURL = ?'
+        par = ('wrong.url',)
+        c.execute(sql, par)
+        self.assertRaises(ODKConfigurationError,
+                          self.copy_xferDB.loadAllConfig, self.copy_conn)
+        self.assertTrue(self.copy_conn.in_transaction)
+        self.copy_conn.rollback()
+
+
+class Check_Config_Cache(unittest.TestCase):
+    """Test that validated configuration settings are reused."""
+
+
+    @classmethod
+    def setUpClass(cls):
+
+        pipelineRunDate = datetime.datetime.now()
+        cls.copy_xferDB = TransferDB(dbFileName = 'copy_Pipeline.db',
+                                     dbDirectory = '.',
+                                     dbKey = 'enilepiP',
+                                     plRunDate = pipelineRunDate)
+        cls.copy_conn = cls.copy_xferDB.connectDB()
+
+    def test_cache_reuses_settings(self):
+        """configODK should return the cached settings on a second call."""
+
+        settingsODK = self.copy_xferDB.configODK(self.copy_conn)
+        self.assertIs(settingsODK, self.copy_xferDB.configODK(self.copy_conn))
+
+    def test_cache_sees_uncommitted_changes(self):
+        """Uncommitted changes on the connection should bypass the cache."""
+
+        self.copy_xferDB.configODK(self.copy_conn)
+        c = self.copy_conn.cursor()
+        sql = 'UPDATE ODK_Conf SET odkURL = ?'
+        par = ('wrong.url',)
+        c.execute(sql, par)
+        self.assertRaises(ODKConfigurationError,
+                          self.copy_xferDB.configODK, self.copy_conn)
+        self.copy_conn.rollback()
+
+    def test_getCachedConfig(self):
+        """getCachedConfig should return the cached settings for each kind."""
+
+        settings = self.copy_xferDB.loadAllConfig(self.copy_conn)
+        for kind in ('pipeline', 'odk', 'openVA', 'dhis'):
+            self.assertEqual(self.copy_xferDB.getCachedConfig(kind),
+                             settings[kind])
+        self.assertIs(self.copy_xferDB.getCachedConfig('odk'),
+                      self.copy_xferDB.getCachedConfig('odk'))
+
+    def test_cache_other_connection(self):
+        """Connections not opened by connectDB should bypass the cache."""
+
+        pipelineRunDate = datetime.datetime.now()
+        other_xferDB = TransferDB(dbFileName = 'copy_Pipeline.db',
+                                  dbDirectory = '.',
+                                  dbKey = 'enilepiP',
+                                  plRunDate = pipelineRunDate)
+        other_conn = other_xferDB.connectDB()
+        try:
+            self.assertIsNot(self.copy_xferDB.configODK(other_conn),
+                             self.copy_xferDB.configODK(other_conn))
+        finally:
+            other_xferDB.close()
+
+    def test_cache_workingDirectory(self):
+        """A cached Pipeline_Conf should still check the working directory."""
+
+        c = self.copy_conn.cursor()
+        c.execute('SELECT workingDirectory FROM Pipeline_Conf')
+        workingDirectory = c.fetchone()[0]
+        sql = 'UPDATE Pipeline_Conf SET workingDirectory = ?'
+        os.makedirs('tmp_workingDirectory', exist_ok = True)
+        try:
+            c.execute(sql, (os.path.abspath('tmp_workingDirectory'),))
+            self.copy_conn.commit()
+            self.copy_xferDB.configPipeline(self.copy_conn)
+            os.rmdir('tmp_workingDirectory')
+            self.assertRaises(PipelineConfigurationError,
+                              self.copy_xferDB.configPipeline, self.copy_conn)
+        finally:
+            c.execute(sql, (workingDirectory,))
+            self.copy_conn.commit()
+            if os.path.isdir('tmp_workingDirectory'):
+                os.rmdir('tmp_workingDirectory')
+
+    def test_settings_no_dict(self):
+        """Settings should be slotted tuples (no per-instance __dict__)."""
+
+        settings = self.copy_xferDB.loadAllConfig(self.copy_conn)
+        for kind in ('pipeline', 'odk', 'openVA'):
+            self.assertIsInstance(settings[kind], tuple)
+            self.assertFalse(hasattr(settings[kind], '__dict__'))
+        self.assertFalse(hasattr(settings['dhis'][0], '__dict__'))
+
+    def test_getCachedConfig_Exception(self):
+        """getCachedConfig should raise an error for an unknown kind."""
+
+        self.assertRaises(PipelineConfigurationError,
+                          self.copy_xferDB.getCachedConfig, 'wrong')
 
 
 if __name__ == '__main__':